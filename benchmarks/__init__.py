@@ -0,0 +1,3 @@
+# Mesures de performance (hors application) : données synthétiques, faux export
+# Google Sheets, exécutions chronométrées des pages et des calculs, tests de charge
+# multi-sessions
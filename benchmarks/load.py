@@ -0,0 +1,280 @@
+# Test de charge : sessions simultanées sur un serveur Streamlit local
+#
+#     python -m benchmarks.load [--scale moyen] [--sessions 1,4,8,16] [--interactions 10] [--warmup]
+#
+# Nécessite le client websockets (pip install -r requirements-dev.txt).
+#
+# Démarre l'application (streamlit run ACCUEIL.py, ou python -m efe.warmup avec
+# --warmup) sur des onglets synthétiques servis par le faux export Google Sheets,
+# puis, pour chaque nombre de sessions, ouvre autant de connexions websocket que
+# de sessions (comme autant de navigateurs). Chaque session affiche une page (BAC,
+# DNB ou EAF) puis change interactions fois d'établissement au hasard dans le
+# sélecteur de la barre latérale. Pour chaque palier sont relevés : latences du
+# premier affichage et des changements d'établissement (p50, p95, p99), débit
+# (réexécutions par seconde), mémoire résidente du serveur avant et après (Linux)
+# et nombre d'erreurs. Les résultats sont enregistrés dans
+# benchmarks/results/<commit>-charge-<taille>.json.
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.run import RESULTS_DIR, ROOT, SCALES, _commit
+
+PAGES = ["BAC", "DNB", "EAF"]
+
+
+# Mémoire résidente d'un processus (octets), None hors Linux
+def rss(pid):
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# Serveur Streamlit lancé dans un sous-processus, arrêté à la sortie du bloc
+class AppServer:
+    def __init__(self, env, warmup=False, timeout=600):
+        self.port = _free_port()
+        command = ["efe.warmup"] if warmup else ["streamlit", "run", "ACCUEIL.py"]
+        self.command = [
+            sys.executable, "-m", *command,
+            "--server.headless", "true",
+            "--server.port", str(self.port),
+            "--browser.gatherUsageStats", "false",
+        ]
+        self.env = env
+        self.timeout = timeout
+        self.process = None
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            self.command, cwd=ROOT, env=self.env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Le serveur s'est arrêté (code {self.process.returncode})")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=1):
+                    return self
+            except OSError:
+                time.sleep(0.2)
+        raise TimeoutError("Le serveur n'a pas démarré")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+# Session simulée : une connexion websocket qui parle le protocole du navigateur
+# (BackMsg / ForwardMsg de Streamlit)
+class Session:
+    def __init__(self, url, page, timeout):
+        self.url = url
+        self.page = page
+        self.timeout = timeout
+        self.selectbox = None
+        self.errors = []
+
+    # Exécuter la page (avec l'état des widgets donné) et attendre la fin de
+    # l'exécution ; renvoie sa durée en secondes
+    async def rerun(self, websocket, widgets=()):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        from efe.selection import KEY
+
+        message = BackMsg()
+        message.rerun_script.page_name = self.page
+        message.rerun_script.widget_states.widgets.extend(widgets)
+        start = time.perf_counter()
+        await websocket.send(message.SerializeToString())
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await asyncio.wait_for(websocket.recv(), self.timeout))
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                if element.WhichOneof("type") == "selectbox" and element.selectbox.id.endswith(KEY):
+                    self.selectbox = element.selectbox
+                elif element.WhichOneof("type") == "exception":
+                    self.errors.append(element.exception.message)
+            # Un changement d'établissement interrompt l'exécution (st.rerun du
+            # sélecteur) puis relance les sections concernées : on attend la fin
+            # de cette seconde exécution
+            elif kind == "script_finished" and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return time.perf_counter() - start
+
+    async def run(self, interactions, rng):
+        import websockets
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        first, latencies = None, []
+        try:
+            async with websockets.connect(self.url, subprotocols=["streamlit"], max_size=None) as websocket:
+                first = await self.rerun(websocket)
+                if self.selectbox is None:
+                    raise RuntimeError(f"{self.page} : sélecteur d'établissement introuvable")
+                options = list(self.selectbox.options)
+                for _ in range(interactions):
+                    widget = WidgetState(id=self.selectbox.id, string_value=rng.choice(options))
+                    latencies.append(await self.rerun(websocket, [widget]))
+        except (OSError, asyncio.TimeoutError, RuntimeError) as error:
+            self.errors.append(f"{type(error).__name__} : {error}")
+        return first, latencies
+
+
+def percentiles(durations):
+    if not durations:
+        return {"p50": None, "p95": None, "p99": None}
+    p50, p95, p99 = np.percentile(durations, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99)}
+
+
+# Un palier : count sessions simultanées sur le serveur
+async def run_level(server, count, interactions, timeout, seed):
+    rng = random.Random(seed)
+    sessions = [Session(server.url, PAGES[index % len(PAGES)], timeout) for index in range(count)]
+    rss_before = rss(server.process.pid)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        session.run(interactions, random.Random(rng.random())) for session in sessions
+    ))
+    elapsed = time.perf_counter() - start
+    rss_after = rss(server.process.pid)
+
+    firsts = [first for first, _ in results if first is not None]
+    latencies = [latency for _, session_latencies in results for latency in session_latencies]
+    errors = [error for session in sessions for error in session.errors]
+    growth = None if rss_before is None or rss_after is None else (rss_after - rss_before) / count
+    return {
+        "sessions": count,
+        "premier affichage": percentiles(firsts),
+        "changement d'établissement": percentiles(latencies),
+        "réexécutions": len(firsts) + len(latencies),
+        "durée": elapsed,
+        "débit": (len(firsts) + len(latencies)) / elapsed,
+        "rss avant": rss_before,
+        "rss après": rss_after,
+        "croissance rss par session": growth,
+        "erreurs": len(errors),
+        "exemples d'erreurs": errors[:3],
+    }
+
+
+def _ms(value):
+    return "       -" if value is None else f"{value * 1000:8.0f}"
+
+
+def _mb(value):
+    return "     -" if value is None else f"{value / 1024 / 1024:6.0f}"
+
+
+def report(level):
+    change = level["changement d'établissement"]
+    print(
+        f"{level['sessions']:>8} {_ms(level['premier affichage']['p50'])} {_ms(level['premier affichage']['p95'])}"
+        f" {_ms(change['p50'])} {_ms(change['p95'])} {_ms(change['p99'])} {level['débit']:8.1f}"
+        f" {_mb(level['rss avant'])} {_mb(level['rss après'])} {_mb(level['croissance rss par session'])}"
+        f" {level['erreurs']:7}"
+    )
+    for error in level["exemples d'erreurs"]:
+        print(f"         {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load", description="Test de charge multi-sessions")
+    parser.add_argument("--scale", choices=SCALES, default="moyen")
+    parser.add_argument("--sessions", default="1,4,8,16", help="nombres de sessions simultanées, séparés par des virgules")
+    parser.add_argument("--interactions", type=int, default=10, help="changements d'établissement par session")
+    parser.add_argument("--latency", type=float, default=0.0, help="délai (s) du faux export Google Sheets")
+    parser.add_argument("--timeout", type=float, default=120, help="délai maximal (s) d'une réexécution")
+    parser.add_argument("--warmup", action="store_true", help="démarrer le serveur avec python -m efe.warmup")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=str(RESULTS_DIR))
+    args = parser.parse_args(argv)
+    counts = [int(count) for count in args.sessions.split(",")]
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        sys.exit("Le test de charge nécessite websockets : pip install -r requirements-dev.txt")
+
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+    from benchmarks.server import SheetExportServer
+    from benchmarks.synthetic import generate, write
+
+    levels = []
+    with tempfile.TemporaryDirectory(prefix="efe-charge-") as workdir:
+        workdir = Path(workdir)
+        write(workdir / "onglets", generate(**SCALES[args.scale]))
+        # Secrets du serveur (identifiant du classeur) dans un répertoire personnel
+        # temporaire : aussi lus par le préchauffage, avant le démarrage du serveur
+        secrets = workdir / ".streamlit" / "secrets.toml"
+        secrets.parent.mkdir()
+        secrets.write_text('[google_sheets]\nfile_id = "benchmark"\n')
+        with SheetExportServer(workdir / "onglets", latency=args.latency) as export:
+            env = {
+                key: value for key, value in os.environ.items()
+                if key not in ("EFE_DATA_DIR", "EFE_BUNDLE_DIR", "EFE_STREAM_CHUNKSIZE")
+            }
+            env.update({
+                "HOME": str(workdir),
+                "EFE_EXPORT_URL": export.url_template,
+                "EFE_SNAPSHOT_DIR": str(workdir / "snapshots"),
+                "EFE_MEMO_DIR": str(workdir / "memo"),
+            })
+            with AppServer(env, warmup=args.warmup) as server:
+                print(f"Serveur prêt (RSS {_mb(rss(server.process.pid)).strip()} Mo)\n")
+                print(
+                    f"{'sessions':>8} {'1er p50':>8} {'1er p95':>8} {'chg p50':>8} {'chg p95':>8} {'chg p99':>8}"
+                    f" {'réex./s':>8} {'RSS av':>6} {'RSS ap':>6} {'/sess.':>6} {'erreurs':>7}"
+                )
+                for index, count in enumerate(counts):
+                    level = asyncio.run(run_level(server, count, args.interactions, args.timeout, args.seed + index))
+                    levels.append(level)
+                    report(level)
+
+    current = {
+        "commit": _commit(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "scale": args.scale,
+        "interactions": args.interactions,
+        "warmup": args.warmup,
+        "levels": levels,
+    }
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+    path = output / f"{current['commit']}-charge-{args.scale}.json"
+    path.write_text(json.dumps(current, ensure_ascii=False, indent=2))
+    print(f"\nRésultats enregistrés dans {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# Mesures de performance des pages et des calculs
+#
+#     python -m benchmarks.run [--scale moyen] [--compare benchmarks/results/<commit>-moyen.json]
+#
+# Génère des onglets synthétiques, les sert par un faux export Google Sheets local
+# puis chronomètre :
+# - chaque étape de calcul (lecture et validation des onglets, dimension
+#   établissement, moteur de requêtes, agrégats, classements, corrélations,
+#   tendances, actualisation incrémentale) ;
+# - chaque page exécutée sans navigateur (Streamlit AppTest) : premier affichage à
+#   froid, premier affichage après un redémarrage (résultats relus sur disque),
+#   affichage suivant, changement d'établissement.
+# Les résultats sont enregistrés dans benchmarks/results/<commit>-<taille>.json. Avec
+# --compare, ils sont comparés à un résultat précédent ; le code de sortie est 1 si
+# une mesure est plus lente que le seuil.
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+PAGES = ["pages/BAC.py", "pages/DNB.py", "pages/EAF.py"]
+
+# Tailles des données synthétiques
+SCALES = {
+    "petit": dict(etablissements=10, specialities=4, sessions=2, rows=1),
+    "moyen": dict(etablissements=40, specialities=8, sessions=3, rows=1),
+    "grand": dict(etablissements=150, specialities=12, sessions=5, rows=1),
+    "candidats": dict(etablissements=40, specialities=8, sessions=3, rows=200),
+}
+
+
+# Durées (en secondes) de repeat appels à func
+def measure(func, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def summarize(durations):
+    return {
+        "median": statistics.median(durations),
+        "min": min(durations),
+        "runs": len(durations),
+    }
+
+
+# Chronométrer chaque étape de calcul, dans l'ordre du chargement de l'application
+def compute_benchmarks(source, repeat):
+    from efe.aggregates import build_aggregates
+    from efe.build import read_sheet
+    from efe.correlations import build_correlations
+    from efe.data import sheets
+    from efe.etablissements import build_etablissements
+    from efe.incremental import IncrementalAggregator
+    from efe.query import build_engine
+    from efe.rankings import build_rankings
+    from efe.trends import build_trends
+
+    results = {}
+
+    def step(name, func):
+        value = func()
+        results[name] = summarize(measure(func, repeat))
+        return value
+
+    raw = step("lecture des onglets", lambda: tuple(read_sheet(source, name, gid) for name, gid in sheets.items()))
+    etablissements = step("dimension établissement", lambda: build_etablissements(raw))
+    datasets = step("rattachement à la dimension", lambda: tuple(etablissements.conform(dataset) for dataset in raw))
+    engine = step("moteur de requêtes", lambda: build_engine(datasets, etablissements))
+    aggregates = step("agrégats", lambda: build_aggregates(engine))
+    step("classements", lambda: build_rankings(aggregates))
+    step("corrélations", lambda: build_correlations(aggregates))
+    step("tendances", lambda: build_trends(aggregates))
+
+    # Actualisation incrémentale : dernière session ajoutée à chaque onglet
+    latest = max(int(dataset.df["session"].max()) for dataset in datasets)
+    previous = tuple(
+        type(dataset)(dataset.name, f"{dataset.version}-", dataset.df[dataset.df["session"] != latest])
+        for dataset in datasets
+    )
+
+    previous_aggregates = build_aggregates(build_engine(previous, etablissements))
+
+    def refresh():
+        aggregator = IncrementalAggregator()
+        aggregator.update(previous, etablissements, build=lambda: previous_aggregates)
+        aggregator.update(datasets, etablissements, build=None)
+
+    step("actualisation incrémentale (dernière session)", refresh)
+    return results
+
+
+# Chronométrer chaque page : premier affichage à froid (caches vidés), après un
+# redémarrage (caches en mémoire vidés, résultats conservés sur disque), affichage
+# suivant (caches chauds) et changement d'établissement
+def page_benchmarks(repeat, timeout):
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    from efe.cache import clear_caches
+
+    results = {}
+    for page in PAGES:
+        def run():
+            at = AppTest.from_file(str(ROOT / page), default_timeout=timeout)
+            at.secrets["google_sheets"] = {"file_id": "benchmark"}
+            at.run()
+            if at.exception:
+                raise RuntimeError(f"{page} : {at.exception[0].message}")
+            return at
+
+        def cold(disk=True):
+            clear_caches(disk=disk)
+            st.cache_data.clear()
+            st.cache_resource.clear()
+            run()
+
+        name = Path(page).stem
+        results[f"{name} : premier affichage"] = summarize(measure(cold, max(1, repeat // 2)))
+        results[f"{name} : premier affichage après redémarrage"] = summarize(
+            measure(lambda: cold(disk=False), max(1, repeat // 2))
+        )
+        results[f"{name} : affichage suivant"] = summarize(measure(run, repeat))
+
+        at = run()
+        selectbox = at.selectbox[0]
+        options = selectbox.options
+        durations = []
+        for index in range(repeat):
+            start = time.perf_counter()
+            selectbox.select(options[(index + 1) % len(options)]).run()
+            durations.append(time.perf_counter() - start)
+        results[f"{name} : changement d'établissement"] = summarize(durations)
+    return results
+
+
+def _commit():
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        return output.stdout.strip() or "inconnu"
+    except OSError:
+        return "inconnu"
+
+
+# Comparer deux résultats : renvoie les mesures plus lentes que threshold × référence
+def compare(baseline, current, threshold):
+    regressions = []
+    print(f"\nComparaison avec {baseline['commit']} ({baseline['scale']}) :")
+    if baseline["scale"] != current["scale"]:
+        print(f"  Attention : tailles de données différentes ({current['scale']} ici)")
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        ratio = result["median"] / reference["median"] if reference["median"] else float("inf")
+        flag = "  << plus lent" if ratio > threshold else ""
+        print(f"  {name:<55} {reference['median'] * 1000:9.1f} ms -> {result['median'] * 1000:9.1f} ms  x{ratio:.2f}{flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Mesurer les performances")
+    parser.add_argument("--scale", choices=SCALES, default="moyen")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="délai (s) du faux export Google Sheets")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--no-pages", action="store_true", help="ne mesurer que les calculs")
+    parser.add_argument("--output", default=str(RESULTS_DIR))
+    parser.add_argument("--compare", help="résultat de référence (fichier JSON)")
+    parser.add_argument("--threshold", type=float, default=1.25, help="ratio au-delà duquel une mesure régresse")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+    from benchmarks.server import SheetExportServer
+    from benchmarks.synthetic import generate, write
+    from efe.snapshot import GoogleSheetSource
+
+    with tempfile.TemporaryDirectory(prefix="efe-benchmark-") as workdir:
+        data_dir = Path(workdir) / "onglets"
+        write(data_dir, generate(**SCALES[args.scale]))
+        with SheetExportServer(data_dir, latency=args.latency) as server:
+            for variable in ("EFE_DATA_DIR", "EFE_BUNDLE_DIR", "EFE_STREAM_CHUNKSIZE"):
+                os.environ.pop(variable, None)
+            os.environ["EFE_EXPORT_URL"] = server.url_template
+            os.environ["EFE_SNAPSHOT_DIR"] = str(Path(workdir) / "snapshots")
+            os.environ["EFE_MEMO_DIR"] = str(Path(workdir) / "memo")
+
+            results = compute_benchmarks(GoogleSheetSource("benchmark", url_template=server.url_template), args.repeat)
+            if not args.no_pages:
+                results.update(page_benchmarks(args.repeat, args.timeout))
+
+    current = {
+        "commit": _commit(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "scale": args.scale,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    for name, result in results.items():
+        print(f"{name:<57} médiane {result['median'] * 1000:9.1f} ms   min {result['min'] * 1000:9.1f} ms")
+
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+    path = output / f"{current['commit']}-{args.scale}.json"
+    path.write_text(json.dumps(current, ensure_ascii=False, indent=2))
+    print(f"\nRésultats enregistrés dans {path}")
+
+    if args.compare:
+        regressions = compare(json.loads(Path(args.compare).read_text()), current, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
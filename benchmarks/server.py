@@ -0,0 +1,58 @@
+# Serveur local qui imite l'export CSV de Google Sheets
+#
+# Sert GET /spreadsheets/d/<classeur>/export?format=csv&gid=<gid> à partir d'un
+# répertoire de fichiers <onglet>.csv (gid → onglet d'après efe.data.sheets). À
+# utiliser avec EFE_EXPORT_URL=<server.url_template>. latency ajoute un délai à
+# chaque réponse pour simuler le réseau.
+import http.server
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+
+from efe.data import sheets
+
+
+class SheetExportServer:
+    def __init__(self, directory, latency=0.0, port=0):
+        self.directory = Path(directory)
+        self.latency = latency
+        self.requests = 0
+        onglets = {gid: name for name, gid in sheets.items()}
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                name = onglets.get(query.get("gid", [""])[0])
+                path = server.directory / f"{name}.csv"
+                if name is None or not path.exists():
+                    self.send_error(404)
+                    return
+                time.sleep(server.latency)
+                body = path.read_bytes()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/csv; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = http.server.ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url_template(self):
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}/spreadsheets/d/{{file_id}}/export?format=csv&gid={{gid}}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,81 @@
+# Générateur de données synthétiques aux schémas des onglets
+#
+#     python -m benchmarks.synthetic <répertoire> [--etablissements 40] [--sessions 3] ...
+#
+# Écrit un fichier <onglet>.csv par onglet (philosophie, eds, go, dnb, eaf). Chaque
+# établissement a un niveau propre, ce qui donne des classements et des
+# corrélations réalistes. rows > 1 produit plusieurs lignes par établissement et
+# session (onglets à une ligne par candidat).
+import argparse
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from efe.schema import SCHEMAS
+
+SPECIALITIES = [
+    "Mathématiques", "Physique-Chimie", "SVT", "SES", "HGGSP", "HLP", "LLCER Anglais",
+    "NSI", "Arts plastiques", "SI", "Biologie-Écologie", "LLCER Espagnol",
+]
+
+
+# Note maximale d'une colonne (« ... (sur 50) »), 20 par défaut
+def _maximum(column):
+    match = re.search(r"sur (\d+)", column)
+    return int(match.group(1)) if match else 20
+
+
+def generate(etablissements=40, specialities=8, sessions=3, rows=1, first_session=2023, seed=0):
+    rng = np.random.default_rng(seed)
+    names = {
+        "lycée": [f"Lycée {index:03d}" for index in range(etablissements)],
+        "collège": [f"Collège {index:03d}" for index in range(etablissements)],
+    }
+    levels = rng.normal(0, 1, etablissements)
+    years = list(range(first_session, first_session + sessions))
+    specialities = (SPECIALITIES * (specialities // len(SPECIALITIES) + 1))[:specialities]
+
+    tables = {}
+    for name, schema in SCHEMAS.items():
+        school = "collège" if name == "dnb" else "lycée"
+        grid = pd.MultiIndex.from_product(
+            [years, range(etablissements)] + ([specialities] if "spécialité" in schema.categories else [])
+        ).to_frame(index=False)
+        grid = grid.loc[grid.index.repeat(rows)].reset_index(drop=True)
+        df = pd.DataFrame({
+            "session": grid[0],
+            "établissement": np.array(names[school])[grid[1]],
+        })
+        if "spécialité" in schema.categories:
+            df["spécialité"] = grid[2]
+        for column in schema.scores:
+            maximum = _maximum(column)
+            scores = maximum * (0.6 + 0.08 * levels[grid[1]] + rng.normal(0, 0.1 if rows == 1 else 0.2, len(grid)))
+            df[column] = np.clip(scores, 0, maximum).round(2)
+        tables[name] = df
+    return tables
+
+
+def write(directory, tables):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, df in tables.items():
+        df.to_csv(directory / f"{name}.csv", index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.synthetic", description="Générer des onglets synthétiques")
+    parser.add_argument("directory")
+    parser.add_argument("--etablissements", type=int, default=40)
+    parser.add_argument("--specialities", type=int, default=8)
+    parser.add_argument("--sessions", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=1, help="lignes par établissement et session")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    write(args.directory, generate(args.etablissements, args.specialities, args.sessions, args.rows, seed=args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Outils partagés par les pages de l'application Résultats EFE Maroc
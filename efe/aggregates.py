@@ -0,0 +1,158 @@
+# Table d'agrégats précalculés
+#
+# Les notes de tous les onglets sont agrégées une seule fois par version des
+# données, par le moteur de requêtes (efe.query), par épreuve × session × établissement × spécialité (somme, nombre de
+# notes, moyenne). Les moyennes de chaque niveau sont des sommes divisées par des
+# nombres de notes : pour un onglet lu en flux (une ligne par groupe), chaque
+# moyenne de groupe pèse donc son nombre de notes. Les moyennes demandées par les pages (par session, par
+# établissement, par spécialité) se lisent ensuite dans cette table au lieu de
+# refiltrer les onglets à chaque interaction. Les sommes et nombres se combinent :
+# une actualisation peut reporter un écart (lignes ajoutées ou retirées) sans tout
+# recalculer (voir efe.incremental).
+import numpy as np
+import pandas as pd
+
+from efe.dataset import versioned
+from efe.schema import weight_columns
+
+# Colonnes de notes de chaque onglet et épreuve correspondante
+EPREUVES = {
+    "philosophie": {"moyenne": "Philosophie"},
+    "eds": {"moyenne": "EDS"},
+    "go": {"moyenne": "Grand Oral"},
+    "dnb": {subject: subject for subject in [
+        "Français (sur 100)", "Hist. Géo.EMC (sur 50)", "Mathématiques (sur 100)",
+        "Sciences (sur 50)", "SO de projet (sur 100)", "Socle Commun (sur 400)",
+        "DNL Hist. Géo. arabe (sur 50)", "Langue de la section (sur 50)"
+    ]},
+    "eaf": {"écrit": "écrit", "oral": "oral"},
+}
+
+KEYS = ["épreuve", "session", "établissement", "spécialité"]
+
+# Valeur de la spécialité pour les épreuves qui n'en ont pas
+NO_SPECIALITY = ""
+
+# Les sommes sont cumulées en dix-millièmes entiers (notes arrondies à 4 décimales) :
+# elles restent exactes quand on ajoute ou retire des lignes
+SCALE = 10_000
+
+
+# Passer des lignes d'un onglet au format long : une ligne par note (épreuve,
+# session, établissement, spécialité, note), avec la somme et le nombre de notes
+# qu'elle représente (une note par ligne, ou tout un groupe pour un onglet lu en flux)
+def notes(name, df):
+    id_columns = ["session", "établissement"] + (["spécialité"] if "spécialité" in df.columns else [])
+    frames = []
+    for column, épreuve in EPREUVES[name].items():
+        # Notes stockées en float32 : retour en double précision, arrondi à 4 décimales
+        # pour retrouver les valeurs saisies dans les onglets
+        note = df[column].astype("float64").round(4)
+        somme, nombre = weight_columns(column)
+        if somme in df.columns:
+            weights = {"somme": df[somme], "nombre": df[nombre]}
+        else:
+            weights = {"somme": note.fillna(0), "nombre": note.notna().astype("int64")}
+        frames.append(df[id_columns].assign(épreuve=épreuve, note=note, **weights))
+    long_df = pd.concat(frames, ignore_index=True)
+    if "spécialité" not in long_df.columns:
+        long_df["spécialité"] = NO_SPECIALITY
+    return long_df
+
+
+# Écart d'agrégats (somme en dix-millièmes, nombre de notes, nombre de lignes) dû à
+# des lignes ajoutées et retirées d'un onglet
+def delta(name, added, removed):
+    long_df = pd.concat([
+        notes(name, added).assign(poids=1),
+        notes(name, removed).assign(poids=-1),
+    ], ignore_index=True)
+    units = (long_df["somme"] * SCALE).round().astype("int64")
+    long_df = long_df.assign(
+        somme=units * long_df["poids"],
+        nombre=long_df["nombre"] * long_df["poids"],
+        lignes=long_df["poids"],
+    )
+    return long_df.groupby(KEYS, observed=True)[["somme", "nombre", "lignes"]].sum()
+
+
+# Table indexée par KEYS dont l'établissement est rattaché à la dimension donnée
+def _conform(table, etablissements):
+    table = table.reset_index()
+    table["établissement"] = etablissements.encode(table["établissement"])
+    return table.set_index(KEYS)
+
+
+@versioned
+class Aggregates:
+    def __init__(self, table, version):
+        self.version = version
+        table = table.astype({"somme": "float64", "nombre": "int64", "lignes": "int64"})
+        table["moyenne"] = table["somme"] / table["nombre"].replace(0, np.nan)
+        self.table = table.set_index(KEYS).sort_index()
+
+        # Agrégats cumulés aux niveaux utilisés par les pages
+        sums = self.table[["somme", "nombre"]]
+        self._by_level = {
+            ("établissement", "spécialité"): self.table,
+            ("établissement",): self._rollup(sums, ["épreuve", "session", "établissement"]),
+            ("spécialité",): self._rollup(sums, ["épreuve", "session", "spécialité"]),
+            (): self._rollup(sums, ["épreuve", "session"]),
+        }
+
+    # Agrégats après application d'un écart (voir delta), sans relire les autres
+    # lignes. L'établissement des deux tables est rattaché à la dimension courante
+    # (etablissements), qui a pu changer depuis la table précédente.
+    def merge(self, changes, version, etablissements):
+        table = self.table[["somme", "nombre", "lignes"]]
+        table = table.assign(somme=(table["somme"] * SCALE).round().astype("int64"))
+        merged = pd.concat([
+            _conform(table, etablissements), _conform(changes, etablissements)
+        ]).groupby(level=KEYS, observed=True).sum()
+        merged = merged[merged["lignes"] > 0]
+        merged["somme"] = merged["somme"] / SCALE
+        return Aggregates(merged.reset_index(), version)
+
+    @staticmethod
+    def _rollup(sums, levels):
+        rolled = sums.groupby(level=levels, observed=True).sum()
+        rolled["moyenne"] = rolled["somme"] / rolled["nombre"].replace(0, np.nan)
+        return rolled
+
+    # Agrégats cumulés à un niveau : level("établissement"), level("spécialité"),
+    # level("établissement", "spécialité") ou level() (par épreuve et session)
+    def level(self, *by):
+        return self._by_level[by]
+
+    # Moyenne d'une épreuve pour une session, éventuellement restreinte à un
+    # établissement et/ou une spécialité (NaN s'il n'y a aucune note)
+    def mean(self, épreuve, session, établissement=None, spécialité=None):
+        level = tuple(name for name, value in [("établissement", établissement), ("spécialité", spécialité)]
+                      if value is not None)
+        key = (épreuve, session) + tuple(value for value in (établissement, spécialité) if value is not None)
+        try:
+            return self._by_level[level].at[key, "moyenne"]
+        except KeyError:
+            return np.nan
+
+    # Moyennes d'une épreuve pour une session, par établissement ou par spécialité
+    def means(self, épreuve, session, by):
+        table = self._by_level[(by,)]
+        try:
+            rows = table.loc[(épreuve, session)]
+        except KeyError:
+            return pd.DataFrame({by: [], "moyenne": []})
+        return rows["moyenne"].rename_axis(by).reset_index()
+
+    # Spécialités présentes pour un établissement et une session
+    def specialities(self, établissement, session, épreuve="EDS"):
+        try:
+            rows = self.table.loc[(épreuve, session, établissement)]
+        except KeyError:
+            return []
+        return [speciality for speciality in rows.index if speciality != NO_SPECIALITY]
+
+
+# Construire la table d'agrégats à partir des onglets chargés dans le moteur de requêtes
+def build_aggregates(engine):
+    return Aggregates(engine.aggregate(), engine.version)
@@ -0,0 +1,98 @@
+# Compilation hors ligne des onglets en lot de données
+#
+#     python -m efe.build --file-id <identifiant du classeur> [--output .cache/bundle]
+#     python -m efe.build --data-dir <répertoire de fichiers <onglet>.csv>
+#     python -m efe.build ... --chunksize 50000   (onglets à une ligne par candidat)
+#
+# Sans --file-id ni --data-dir, l'identifiant du classeur est lu dans
+# .streamlit/secrets.toml. L'application sert le lot courant du répertoire désigné
+# par EFE_BUNDLE_DIR.
+import argparse
+import hashlib
+import io
+import os
+import sys
+import time
+import tomllib
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from efe.aggregates import build_aggregates
+from efe.bundle import write_bundle
+from efe.correlations import build_correlations
+from efe.data import prepare_sheet, sheets
+from efe.etablissements import build_etablissements
+from efe.query import build_engine
+from efe.rankings import build_rankings
+from efe.snapshot import GoogleSheetSource, LocalDirectorySource
+from efe.streaming import stream_sheet
+
+DEFAULT_BUNDLE_DIR = ".cache/bundle"
+SECRETS = ".streamlit/secrets.toml"
+
+
+# Lire et valider un onglet (même empreinte de contenu que la copie locale de
+# l'application), en flux par blocs de chunksize lignes si chunksize est donné
+def read_sheet(source, name, gid, chunksize=None):
+    if chunksize:
+        with source.open(name, gid) as stream:
+            df, content_hash, issues = stream_sheet(name, stream, chunksize)
+        return prepare_sheet(name, df, {"hash": content_hash, "issues": issues})
+    raw = source.fetch(name, gid)
+    return prepare_sheet(name, pd.read_csv(io.BytesIO(raw)), {"hash": hashlib.sha256(raw).hexdigest()})
+
+
+# Lire tous les onglets en parallèle, les rattacher à la dimension établissement et
+# calculer agrégats, classements et corrélations
+def compile_sheets(source, chunksize=None):
+    with ThreadPoolExecutor(max_workers=len(sheets)) as executor:
+        futures = {
+            name: executor.submit(read_sheet, source, name, gid, chunksize) for name, gid in sheets.items()
+        }
+        datasets = tuple(futures[name].result() for name in sheets)
+    etablissements = build_etablissements(datasets)
+    datasets = tuple(etablissements.conform(dataset) for dataset in datasets)
+    aggregates = build_aggregates(build_engine(datasets, etablissements))
+    return datasets, aggregates, build_rankings(aggregates), build_correlations(aggregates)
+
+
+def _source(args):
+    if args.data_dir:
+        return LocalDirectorySource(args.data_dir)
+    file_id = args.file_id
+    if file_id is None:
+        try:
+            with open(SECRETS, "rb") as f:
+                file_id = tomllib.load(f)["google_sheets"]["file_id"]
+        except (OSError, KeyError, tomllib.TOMLDecodeError):
+            sys.exit(f"Indiquer --file-id ou --data-dir (identifiant du classeur introuvable dans {SECRETS})")
+    return GoogleSheetSource(file_id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m efe.build", description="Compiler les onglets en lot de données")
+    origin = parser.add_mutually_exclusive_group()
+    origin.add_argument("--file-id", help="identifiant du classeur Google Sheets")
+    origin.add_argument("--data-dir", help="répertoire contenant un fichier <onglet>.csv par onglet")
+    parser.add_argument("--output", default=os.environ.get("EFE_BUNDLE_DIR", DEFAULT_BUNDLE_DIR),
+                        help="répertoire des lots (par défaut : EFE_BUNDLE_DIR ou %(default)s)")
+    parser.add_argument("--chunksize", type=int,
+                        help="lire les onglets en flux par blocs de CHUNKSIZE lignes (une ligne par candidat)")
+    parser.add_argument("--keep", type=int, default=2, help="nombre de lots conservés (par défaut : %(default)s)")
+    args = parser.parse_args(argv)
+
+    source = _source(args)
+    start = time.perf_counter()
+    datasets, aggregates, rankings, correlations = compile_sheets(source, args.chunksize)
+    path = write_bundle(args.output, datasets, aggregates, rankings, correlations, source=repr(source), keep=args.keep)
+
+    for dataset in datasets:
+        print(f"{dataset.name} : {len(dataset.df)} lignes")
+        for issue in dataset.issues:
+            print(f"  {issue}")
+    print(f"Lot {path.name} écrit dans {path} en {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# Lot de données compilé hors ligne
+#
+# La commande `python -m efe.build` lit les onglets, les valide et calcule les
+# agrégats, classements et corrélations, puis les écrit dans un lot versionné :
+# un répertoire <version>/ contenant un fichier Arrow IPC non compressé par table
+# et un manifeste JSON. Le fichier CURRENT désigne le lot servi ; il n'est remplacé
+# qu'une fois le nouveau lot complet. L'application projette les fichiers en
+# mémoire (memory map) au démarrage, sans accès réseau ni recalcul.
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pyarrow.feather as feather
+
+from efe.aggregates import Aggregates
+from efe.correlations import Correlations
+from efe.dataset import Dataset
+from efe.etablissements import build_etablissements
+from efe.rankings import Rankings
+from efe.snapshot import _atomic_write
+
+FORMAT = 1
+CURRENT = "CURRENT"
+MANIFEST = "manifest.json"
+
+
+class BundleError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Bundle:
+    version: str
+    manifest: dict = field(repr=False, compare=False)
+    etablissements: object = field(repr=False, compare=False)
+    datasets: dict = field(repr=False, compare=False)
+    aggregates: Aggregates = field(repr=False, compare=False)
+    rankings: Rankings = field(repr=False, compare=False)
+    correlations: Correlations = field(repr=False, compare=False)
+
+
+def _write_table(path, df):
+    feather.write_feather(df, path, compression="uncompressed")
+
+
+# Table projetée en mémoire. Les colonnes numériques des DataFrames renvoyés
+# pointent directement sur le fichier (sans copie) : tous les processus qui
+# ouvrent le même lot partagent les mêmes pages physiques.
+def _read_table(path):
+    return feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+
+
+# Version d'un lot : empreinte des versions des onglets et du format
+def bundle_version(datasets):
+    tokens = [f"format={FORMAT}"] + sorted(dataset.version for dataset in datasets)
+    return hashlib.sha256("\n".join(tokens).encode()).hexdigest()[:16]
+
+
+# Écrire un lot dans directory et en faire le lot courant. Les lots plus anciens
+# sont supprimés, hormis les keep plus récents. Renvoie le chemin du lot.
+def write_bundle(directory, datasets, aggregates, rankings, correlations, source="", keep=2):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    version = bundle_version(datasets)
+    path = directory / version
+
+    if not (path / MANIFEST).exists():
+        staging = Path(tempfile.mkdtemp(dir=directory, prefix=f".{version}."))
+        try:
+            for dataset in datasets:
+                _write_table(staging / f"onglet-{dataset.name}.arrow", dataset.df)
+            _write_table(staging / "aggregates.arrow", aggregates.table.reset_index())
+            _write_table(staging / "rankings.arrow", rankings.scores)
+            scores, matrices = correlations.tables
+            _write_table(staging / "correlation-scores.arrow", scores.reset_index())
+            _write_table(staging / "correlation-matrices.arrow", matrices.reset_index())
+            manifest = {
+                "format": FORMAT,
+                "version": version,
+                "built_at": time.time(),
+                "source": source,
+                "aggregates": aggregates.version,
+                "onglets": [
+                    {"name": dataset.name, "version": dataset.version, "issues": list(dataset.issues)}
+                    for dataset in datasets
+                ],
+            }
+            (staging / MANIFEST).write_text(json.dumps(manifest, ensure_ascii=False, indent=2))
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(staging, path)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    _atomic_write(directory / CURRENT, lambda f: f.write(version.encode()))
+    _prune(directory, keep)
+    return path
+
+
+# Supprimer les lots les plus anciens (le lot courant est toujours conservé)
+def _prune(directory, keep):
+    current = current_version(directory)
+    bundles = sorted(
+        (path for path in directory.iterdir() if (path / MANIFEST).exists() and path.name != current),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+    for path in bundles[max(keep - 1, 0):]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+# Version du lot courant d'un répertoire, ou None s'il n'y en a pas
+def current_version(directory):
+    try:
+        return (Path(directory) / CURRENT).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+# Relire un lot (répertoire <version>/) : les tables sont projetées en mémoire
+def read_bundle(path):
+    path = Path(path)
+    try:
+        manifest = json.loads((path / MANIFEST).read_text())
+    except (OSError, ValueError) as exc:
+        raise BundleError(f"Lot de données illisible : {path} ({exc})") from exc
+    if manifest.get("format") != FORMAT:
+        raise BundleError(f"Format de lot non pris en charge : {manifest.get('format')!r} ({path})")
+
+    datasets = {
+        sheet["name"]: Dataset(
+            sheet["name"], sheet["version"],
+            _read_table(path / f"onglet-{sheet['name']}.arrow"),
+            tuple(sheet["issues"])
+        )
+        for sheet in manifest["onglets"]
+    }
+    version = manifest["aggregates"]
+    aggregates = Aggregates(_read_table(path / "aggregates.arrow"), version)
+    rankings = Rankings.from_scores(_read_table(path / "rankings.arrow"), version)
+    correlations = Correlations.from_tables(
+        _read_table(path / "correlation-scores.arrow").set_index(["session", "établissement"]),
+        _read_table(path / "correlation-matrices.arrow").set_index(["session", "méthode", "épreuve"]),
+        version,
+    )
+    return Bundle(
+        version=manifest["version"],
+        manifest=manifest,
+        etablissements=build_etablissements(tuple(datasets.values())),
+        datasets=datasets,
+        aggregates=aggregates,
+        rankings=rankings,
+        correlations=correlations,
+    )
@@ -0,0 +1,405 @@
+# Caches mémoïsés bornés en mémoire
+#
+# Les fonctions mémoïsées (cache_data / cache_resource de efe.dataset) sont
+# regroupées en familles : chargement des données, calculs des pages, gabarits de
+# figures. Chaque famille a un budget mémoire ; lorsqu'il est dépassé, les entrées
+# les moins récemment utilisées de la famille sont évincées (LRU). La taille d'une
+# entrée est celle de sa copie sérialisée (cache_data) ou une estimation de la
+# mémoire occupée par l'objet partagé (cache_resource). Chaque famille compte ses
+# succès, recalculs et évictions (panneau de profilage, family_stats).
+#
+# Budgets par défaut (DEFAULT_BUDGETS, en Mo), modifiables par variable
+# d'environnement : EFE_CACHE_BUDGET_CHARGEMENT, EFE_CACHE_BUDGET_CALCULS,
+# EFE_CACHE_BUDGET_FIGURES.
+#
+# Les fonctions mémoïsées avec persist=True conservent aussi leurs résultats sur
+# disque (DiskMemo, répertoire EFE_MEMO_DIR, .cache/memo par défaut ; vide pour
+# désactiver) : un processus redémarré les relit au lieu de les recalculer. Un
+# résultat y est désigné par la fonction (nom, empreinte du fichier qui la définit
+# et versions de pandas et plotly), l'empreinte du code du paquet efe, et ses
+# arguments (les objets versionnés par leur version des données). Les écritures
+# sont atomiques, et un fichier illisible est supprimé puis recalculé ; au-delà de
+# EFE_MEMO_BUDGET Mo, les fichiers les moins récemment utilisés sont supprimés.
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly
+
+from efe.snapshot import _atomic_write
+
+MB = 1024 * 1024
+DEFAULT_BUDGETS = {"chargement": 1024, "calculs": 256, "figures": 128}
+DEFAULT_FAMILY = "calculs"
+DEFAULT_MEMO_DIR = ".cache/memo"
+DEFAULT_MEMO_BUDGET = 512  # Mo
+LIBRARIES = f"pandas {pd.__version__} plotly {plotly.__version__}"
+
+_families = {}
+_families_lock = threading.Lock()
+
+
+class CacheFamily:
+    def __init__(self, name, budget):
+        self.name = name
+        self.budget = budget  # Octets
+        self.entries = OrderedDict()  # (fonction, clé) → (valeur, taille), de la moins à la plus récente
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._computing = {}  # (fonction, clé) → verrou du calcul en cours
+
+    def _get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def _put(self, key, value, size):
+        with self._lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self.entries[key] = (value, size)
+            self.size += size
+            # La dernière entrée est toujours conservée, même si elle dépasse le budget
+            while self.size > self.budget and len(self.entries) > 1:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+
+    # Valeur en cache pour key, sinon compute() → (valeur, taille) est appelé une
+    # seule fois même si plusieurs sessions la demandent en même temps
+    def lookup(self, key, compute):
+        found, value = self._get(key)
+        if found:
+            return value
+        with self._lock:
+            pending = self._computing.setdefault(key, threading.Lock())
+        with pending:
+            found, value = self._get(key)
+            if found:
+                return value
+            with self._lock:
+                self.misses += 1
+            try:
+                value, size = compute()
+                self._put(key, value, size)
+            finally:
+                with self._lock:
+                    self._computing.pop(key, None)
+            return value
+
+    # Supprimer les entrées d'une fonction (toutes si function est None)
+    def clear(self, function=None):
+        with self._lock:
+            for key in [key for key in self.entries if function is None or key[0] == function]:
+                self.size -= self.entries.pop(key)[1]
+
+    # Nombre d'entrées et taille par fonction
+    def usage(self):
+        usage = {}
+        with self._lock:
+            for (function, _), (_, size) in self.entries.items():
+                entries, total = usage.get(function[0], (0, 0))
+                usage[function[0]] = (entries + 1, total + size)
+        return usage
+
+
+def _budget(name):
+    return float(os.environ.get(f"EFE_CACHE_BUDGET_{name.upper()}", DEFAULT_BUDGETS.get(name, 256))) * MB
+
+
+def family_cache(name):
+    with _families_lock:
+        if name not in _families:
+            _families[name] = CacheFamily(name, _budget(name))
+        return _families[name]
+
+
+# Vider toutes les familles (mesures à froid), et la mémoïsation sur disque si disk
+def clear_caches(disk=False):
+    with _families_lock:
+        families = list(_families.values())
+    for family in families:
+        family.clear()
+    memo = disk_memo() if disk else None
+    if memo is not None:
+        for path in memo.files():
+            path.unlink(missing_ok=True)
+
+
+# Estimation de la mémoire occupée par un objet et ce qu'il référence (octets). Les
+# objets déjà comptés (seen) ne le sont pas deux fois.
+def sizeof(value, seen=None):
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, pd.Index):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sizeof(key, seen) + sizeof(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(sizeof(item, seen) for item in value)
+    elif hasattr(value, "__dict__") and not isinstance(value, type):
+        size += sizeof(vars(value), seen)
+    return size
+
+
+# Résultats sérialisés conservés sur disque, un fichier par résultat
+class DiskMemo:
+    def __init__(self, directory, budget):
+        self.directory = Path(directory)
+        self.budget = budget  # Octets
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key):
+        (name, source), arguments = key
+        return self.directory / f"{name}-{source}-{_CODE_VERSION}-{arguments}.pickle"
+
+    # Résultat sérialisé, ou None s'il n'a pas été conservé
+    def read(self, key):
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # Date d'utilisation pour l'éviction LRU
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    # Supprimer un résultat illisible (fichier tronqué…) : sa lecture est comptée
+    # comme infructueuse
+    def discard(self, key):
+        self._path(key).unlink(missing_ok=True)
+        with self._lock:
+            self.hits -= 1
+            self.misses += 1
+
+    def write(self, key, data):
+        try:
+            _atomic_write(self._path(key), lambda f: f.write(data))
+        except OSError:
+            return  # Disque plein ou en lecture seule : le résultat reste en mémoire
+        with self._lock:
+            self.writes += 1
+        self._evict()
+
+    def files(self):
+        return list(self.directory.glob("*.pickle"))
+
+    # Supprimer les fichiers les moins récemment utilisés au-delà du budget (le
+    # répertoire peut être partagé par plusieurs processus)
+    def _evict(self):
+        entries = []
+        for path in self.files():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries)[:-1]:
+            if total <= self.budget:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def size(self):
+        return sum(path.stat().st_size for path in self.files() if path.exists())
+
+
+# Empreinte du code du paquet efe : les résultats conservés sur disque par une autre
+# version du code (classes modifiées) ne sont pas relus
+def _code_version():
+    digest = hashlib.blake2b(digest_size=8)
+    for path in sorted(Path(__file__).parent.glob("*.py")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+_CODE_VERSION = _code_version()
+_disk_memo = None
+
+
+# Mémoïsation sur disque partagée par le processus, ou None si elle est désactivée
+def disk_memo():
+    global _disk_memo
+    directory = os.environ.get("EFE_MEMO_DIR", DEFAULT_MEMO_DIR)
+    if not directory:
+        return None
+    with _families_lock:
+        if _disk_memo is None or _disk_memo.directory != Path(directory):
+            budget = float(os.environ.get("EFE_MEMO_BUDGET", DEFAULT_MEMO_BUDGET)) * MB
+            _disk_memo = DiskMemo(directory, budget)
+        return _disk_memo
+
+
+def _update(digest, value, hash_funcs):
+    for cls, hash_func in hash_funcs.items():
+        if isinstance(value, cls):
+            digest.update(repr(hash_func(value)).encode())
+            return
+    digest.update(type(value).__name__.encode())
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        if isinstance(value, pd.DataFrame):
+            columns, dtypes = list(value.columns), list(value.dtypes)
+        else:
+            columns, dtypes = [value.name], [value.dtype]
+        digest.update(repr((columns, [str(dtype) for dtype in dtypes])).encode())
+        digest.update(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+    elif isinstance(value, (list, tuple)):
+        digest.update(str(len(value)).encode())
+        for item in value:
+            _update(digest, item, hash_funcs)
+    elif isinstance(value, dict):
+        digest.update(str(len(value)).encode())
+        for key, item in value.items():
+            _update(digest, key, hash_funcs)
+            _update(digest, item, hash_funcs)
+    elif value is None or isinstance(value, (str, bytes, int, float, bool)):
+        digest.update(repr(value).encode())
+    else:
+        digest.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+# Clé de cache des arguments d'un appel
+def args_key(args, kwargs, hash_funcs):
+    digest = hashlib.blake2b(digest_size=16)
+    _update(digest, args, hash_funcs)
+    _update(digest, sorted(kwargs.items()), hash_funcs)
+    return digest.hexdigest()
+
+
+# Identité d'une fonction : son nom et l'empreinte du fichier source qui la définit
+# (une page modifiée, y compris ses fonctions auxiliaires et variables globales, ne
+# réutilise pas les entrées calculées par l'ancienne version) et des versions de
+# pandas et plotly (objets sérialisés par une autre version de ces bibliothèques)
+def _function_id(func, name):
+    func = inspect.unwrap(func)
+    digest = hashlib.blake2b(LIBRARIES.encode(), digest_size=8)
+    try:
+        digest.update(Path(inspect.getsourcefile(func)).read_bytes())
+    except (OSError, TypeError):
+        digest.update(func.__code__.co_code)
+    return name, digest.hexdigest()
+
+
+# Mémoïser func dans la famille donnée. copy=True (cache_data) : le résultat est
+# conservé sérialisé et chaque appel en reçoit une copie ; copy=False
+# (cache_resource) : l'objet est partagé tel quel. persist=True : le résultat est
+# aussi conservé sur disque (voir DiskMemo).
+def memoize(func, name, family=DEFAULT_FAMILY, copy=False, persist=False, hash_funcs=None):
+    cache = family_cache(family)
+    function = _function_id(func, name)
+    hash_funcs = hash_funcs or {}
+
+    def compute(key, args, kwargs):
+        memo = disk_memo() if persist else None
+        data = memo.read(key) if memo is not None else None
+        if data is not None:
+            try:
+                value = pickle.loads(data)
+            except Exception:
+                memo.discard(key)  # Fichier illisible : supprimé puis recalculé
+                data = None
+        if data is None:
+            value = func(*args, **kwargs)
+            if copy or memo is not None:
+                try:
+                    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+                except Exception:
+                    if copy:
+                        raise
+                    data = None  # Objet non sérialisable : conservé en mémoire seulement
+            if memo is not None and data is not None:
+                memo.write(key, data)
+        if copy:
+            return data, len(data)
+        return value, sizeof(value)
+
+    def call(*args, **kwargs):
+        key = (function, args_key(args, kwargs, hash_funcs))
+        value = cache.lookup(key, lambda: compute(key, args, kwargs))
+        return pickle.loads(value) if copy else value
+
+    call.clear = lambda: cache.clear(function)
+    return call
+
+
+def _hit_rate(hits, misses):
+    return round(hits / (hits + misses), 3) if hits + misses else None
+
+
+# Statistiques par famille : budget, taille, entrées, succès, recalculs, évictions
+# (et celles de la mémoïsation sur disque, où les recalculs sont les lectures
+# infructueuses)
+def family_stats():
+    with _families_lock:
+        families = list(_families.values())
+        memo = _disk_memo
+    rows = [
+        {
+            "famille": family.name,
+            "budget (Mo)": round(family.budget / MB, 1),
+            "taille (Mo)": round(family.size / MB, 2),
+            "entrées": len(family.entries),
+            "succès": family.hits,
+            "recalculs": family.misses,
+            "évictions": family.evictions,
+            "taux de succès": _hit_rate(family.hits, family.misses),
+        }
+        for family in families
+    ]
+    if memo is not None:
+        rows.append({
+            "famille": "disque",
+            "budget (Mo)": round(memo.budget / MB, 1),
+            "taille (Mo)": round(memo.size() / MB, 2),
+            "entrées": len(memo.files()),
+            "succès": memo.hits,
+            "recalculs": memo.misses,
+            "évictions": memo.evictions,
+            "taux de succès": _hit_rate(memo.hits, memo.misses),
+        })
+    return pd.DataFrame(rows)
+
+
+# Nombre d'entrées et taille (octets) par fonction, toutes familles confondues
+def function_usage():
+    with _families_lock:
+        families = list(_families.values())
+    usage = {}
+    for family in families:
+        usage.update(family.usage())
+    return usage
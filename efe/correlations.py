@@ -0,0 +1,88 @@
+# Corrélations entre épreuves
+#
+# Les moyennes de chaque établissement sont mises en colonnes (une colonne par
+# épreuve, tous onglets confondus) une seule fois par version des agrégats et par
+# session. Les matrices de corrélation (Pearson et Spearman) en sont déduites
+# directement ; elles couvrent aussi les épreuves d'examens différents (ex. EAF
+# écrit et Philosophie), corrélées d'un établissement à l'autre.
+import numpy as np
+import pandas as pd
+
+from efe.dataset import versioned
+
+METHODS = ("pearson", "spearman")
+
+
+# Indices des k plus grandes valeurs absolues, par ordre décroissant (ordre
+# d'apparition en cas d'égalité)
+def _top_indices(values, k):
+    magnitudes = np.abs(values)
+    if k < len(values):
+        # Toutes les valeurs égales à la k-ième sont candidates : argpartition ne
+        # garderait pas forcément les premières apparues
+        threshold = -np.partition(-magnitudes, k - 1)[k - 1]
+        candidates = np.flatnonzero(magnitudes >= threshold)
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.lexsort((candidates, -magnitudes[candidates]))][:k]
+
+
+@versioned
+class Correlations:
+    def __init__(self, aggregates):
+        # Moyenne de chaque établissement par épreuve (lignes session × établissement)
+        scores = aggregates.level("établissement")["moyenne"].unstack("épreuve")
+        matrices = pd.concat({
+            (session, method): table.droplevel("session").corr(method=method)
+            for session, table in scores.groupby(level="session")
+            for method in METHODS
+        }, names=["session", "méthode", "épreuve"])
+        self._index(scores, matrices, aggregates.version)
+
+    # Corrélations relues depuis leurs tables (lot de données compilé)
+    @classmethod
+    def from_tables(cls, scores, matrices, version):
+        correlations = cls.__new__(cls)
+        correlations._index(scores, matrices, version)
+        return correlations
+
+    def _index(self, scores, matrices, version):
+        self.version = version
+        self.tables = scores, matrices
+        self._scores = {
+            session: table.droplevel("session")
+            for session, table in scores.groupby(level="session")
+        }
+        self._matrices = {
+            key: matrix.droplevel(["session", "méthode"])
+            for key, matrix in matrices.groupby(level=["session", "méthode"], sort=False)
+        }
+
+    # Moyennes par établissement (lignes) et par épreuve (colonnes) pour une session
+    def scores(self, session, épreuves=None):
+        scores = self._scores.get(session, pd.DataFrame())
+        return scores if épreuves is None else scores.reindex(columns=épreuves)
+
+    # Matrice de corrélation entre les épreuves données (toutes par défaut)
+    def matrix(self, session, épreuves=None, method="pearson"):
+        matrix = self._matrices.get((session, method), pd.DataFrame())
+        return matrix if épreuves is None else matrix.reindex(index=épreuves, columns=épreuves)
+
+    # Les k paires d'épreuves les plus corrélées (en valeur absolue), de la plus
+    # corrélée à la moins corrélée : colonnes épreuve 1, épreuve 2, corrélation
+    def top_pairs(self, session, épreuves=None, k=2, method="pearson"):
+        matrix = self.matrix(session, épreuves, method)
+        rows, columns = np.triu_indices(len(matrix), k=1)
+        values = matrix.to_numpy()[rows, columns]
+        present = ~np.isnan(values)
+        rows, columns, values = rows[present], columns[present], values[present]
+        top = _top_indices(values, k)
+        return pd.DataFrame({
+            "épreuve 1": matrix.index[rows[top]],
+            "épreuve 2": matrix.columns[columns[top]],
+            "corrélation": values[top],
+        })
+
+
+def build_correlations(aggregates):
+    return Correlations(aggregates)
@@ -0,0 +1,227 @@
+# Accès aux données partagé par toutes les pages
+#
+# Les onglets sont chargés ensemble, en parallèle, et conservés une seule fois pour
+# l'ensemble de l'application (et non une fois par page). Une fois chargés, ils
+# sont actualisés en arrière-plan : les sessions n'attendent jamais le réseau.
+#
+# Si EFE_BUNDLE_DIR est défini, l'application sert à la place le lot de données
+# compilé par `python -m efe.build` : ni téléchargement ni recalcul au démarrage.
+import os
+import time
+from pathlib import Path
+
+import streamlit as st
+
+from efe.aggregates import build_aggregates
+from efe.bundle import BundleError, current_version, read_bundle
+from efe.correlations import build_correlations
+from efe.dataset import Dataset, cache_resource
+from efe.etablissements import build_etablissements
+from efe.incremental import IncrementalAggregator
+from efe.profiling import profiled
+from efe.query import build_engine
+from efe.rankings import build_rankings
+from efe.schema import apply_schema
+from efe.refresher import SheetRefresher
+from efe.snapshot import default_store, local_data_dir
+from efe.trends import build_trends
+
+# Identifiants (gid) des onglets du classeur Google Sheets
+sheets = {
+    "philosophie": "776936543",
+    "eds": "455744397",
+    "go": "1814626375",
+    "dnb": "1644783757",
+    "eaf": "1206285985"
+}
+
+
+# Typer un onglet fraîchement lu selon son schéma et l'associer à la version de son contenu
+# (métadonnées de la copie locale : empreinte, anomalies relevées lors d'une lecture en flux)
+def prepare_sheet(name, df, metadata):
+    df, issues = apply_schema(name, df)
+    issues = metadata.get("issues", []) + issues
+    return Dataset(name, f"{name}:{metadata['hash'][:16]}", df, tuple(issues))
+
+
+# Copie locale des onglets (Parquet) et actualisation en arrière-plan, partagées par
+# toutes les sessions
+@st.cache_resource
+def get_refresher(file_id):
+    return SheetRefresher(default_store(file_id), sheets, prepare=prepare_sheet)
+
+
+# L'identifiant du classeur (secrets) n'est requis que pour la source Google Sheets
+def _refresher():
+    file_id = None if local_data_dir() else st.secrets["google_sheets"]["file_id"]
+    return get_refresher(file_id)
+
+
+# Dimension établissement et onglets rattachés à celle-ci, construits une seule
+# fois par version des onglets
+@cache_resource(family="chargement")
+def _build_etablissements(datasets):
+    etablissements = build_etablissements(datasets)
+    return etablissements, {dataset.name: etablissements.conform(dataset) for dataset in datasets}
+
+
+# Lot compilé courant (relu lorsque le fichier CURRENT désigne un nouveau lot)
+@st.cache_resource(max_entries=2)
+def _open_bundle(path):
+    return read_bundle(path)
+
+
+# Lot compilé servi, ou None si EFE_BUNDLE_DIR n'est pas défini
+def _bundle():
+    directory = os.environ.get("EFE_BUNDLE_DIR")
+    if not directory:
+        return None
+    version = current_version(directory)
+    if version is None:
+        raise BundleError(f"Aucun lot de données dans {directory} (voir python -m efe.build)")
+    return _open_bundle(str(Path(directory) / version))
+
+
+def _conformed():
+    bundle = _bundle()
+    if bundle is not None:
+        return bundle.etablissements, bundle.datasets
+    return _build_etablissements(tuple(_refresher().get().values()))
+
+
+# Charger tous les onglets (un Dataset par onglet). Le premier chargement les
+# télécharge en parallèle : le temps de chargement à froid est celui de l'onglet le
+# plus lent, et non la somme des téléchargements. La colonne établissement de
+# chaque onglet est une catégorie de la dimension établissement (mêmes noms et mêmes
+# codes dans tous les onglets). Les DataFrames renvoyés sont partagés et ne doivent
+# pas être modifiés.
+@profiled("chargement des onglets")
+def load_datasets():
+    return _conformed()[1]
+
+
+# Dimension établissement (identifiants, noms affichés, listes des sélecteurs)
+def load_etablissements():
+    return _conformed()[0]
+
+
+# Fonction pour charger un onglet spécifique
+def load_dataset(name):
+    return load_datasets()[name]
+
+
+# Moteur de requêtes SQL sur les onglets, chargé une seule fois par version des
+# onglets et partagé
+@cache_resource(family="chargement")
+def _build_engine(datasets, etablissements):
+    return build_engine(datasets, etablissements)
+
+
+@profiled("moteur de requêtes")
+def load_engine():
+    etablissements, datasets = _conformed()
+    return _build_engine(tuple(datasets.values()), etablissements)
+
+
+# Agrégation incrémentale partagée par toutes les sessions
+@st.cache_resource
+def get_aggregator():
+    return IncrementalAggregator()
+
+
+# Table d'agrégats (somme, nombre, moyenne par épreuve × session × établissement ×
+# spécialité), construite une seule fois par version des onglets et partagée. Au
+# premier chargement elle est calculée par le moteur de requêtes ; lors d'une
+# actualisation, seules les lignes ajoutées ou modifiées sont reportées. Les
+# agrégats et les résultats qui en sont tirés sont aussi conservés sur disque
+# (efe.cache) : un processus redémarré les relit au lieu de les recalculer.
+@cache_resource(family="chargement", persist=True)
+def _build_aggregates(datasets, etablissements):
+    return get_aggregator().update(
+        datasets, etablissements, build=lambda: build_aggregates(_build_engine(datasets, etablissements))
+    )
+
+
+@profiled("agrégats")
+def load_aggregates():
+    bundle = _bundle()
+    if bundle is not None:
+        return bundle.aggregates
+    etablissements, datasets = _conformed()
+    return _build_aggregates(tuple(datasets.values()), etablissements)
+
+
+# Classements de toutes les épreuves, calculés une seule fois par version des agrégats
+@cache_resource(family="chargement", persist=True)
+def _build_rankings(aggregates):
+    return build_rankings(aggregates)
+
+
+@profiled("classements")
+def load_rankings():
+    bundle = _bundle()
+    if bundle is not None:
+        return bundle.rankings
+    return _build_rankings(load_aggregates())
+
+
+# Corrélations entre épreuves, calculées une seule fois par version des agrégats
+@cache_resource(family="chargement", persist=True)
+def _build_correlations(aggregates):
+    return build_correlations(aggregates)
+
+
+@profiled("corrélations")
+def load_correlations():
+    bundle = _bundle()
+    if bundle is not None:
+        return bundle.correlations
+    return _build_correlations(load_aggregates())
+
+
+# Séries des moyennes par session et variations d'une session à l'autre, calculées
+# une seule fois par version des agrégats
+@cache_resource(family="chargement", persist=True)
+def _build_trends(aggregates):
+    return build_trends(aggregates)
+
+
+@profiled("tendances")
+def load_trends():
+    return _build_trends(load_aggregates())
+
+
+def _format_age(seconds):
+    if seconds < 60:
+        return "moins d'une minute"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min"
+    return f"{int(seconds // 3600)} h"
+
+
+def _display_issues():
+    for dataset in load_datasets().values():
+        if dataset is not None and dataset.issues:
+            st.caption(f"Onglet {dataset.name} : " + " ; ".join(dataset.issues))
+
+
+# Afficher l'âge des données et les échecs d'actualisation (dans la barre latérale)
+def display_refresh_status():
+    bundle = _bundle()
+    if bundle is not None:
+        _display_issues()
+        st.caption(f"Données compilées il y a {_format_age(time.time() - bundle.manifest['built_at'])}")
+        return
+
+    status = _refresher().status()
+    for sheet in status:
+        if sheet["erreur"]:
+            st.warning(
+                f"Actualisation de l'onglet {sheet['onglet']} impossible ({sheet['erreur']}). "
+                "Les dernières données connues sont affichées."
+            )
+    _display_issues()
+    ages = [sheet["age"] for sheet in status if sheet["age"] is not None]
+    if ages:
+        refreshing = " (actualisation en cours)" if any(sheet["en_cours"] for sheet in status) else ""
+        st.caption(f"Données vérifiées il y a {_format_age(max(ages))}{refreshing}")
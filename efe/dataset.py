@@ -0,0 +1,62 @@
+# Jeux de données versionnés
+#
+# Un Dataset associe un DataFrame à un jeton de version (l'empreinte du contenu de
+# l'onglet). Les fonctions mémoïsées avec cache_data / cache_resource sont indexées
+# sur ce jeton et non sur le contenu du DataFrame : le calcul de la clé de cache
+# reste O(1) quelle que soit la taille des onglets.
+import abc
+import functools
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from efe.cache import memoize
+from efe.profiling import instrument_cache
+
+# Classes dont les instances sont hachées par leur attribut version. Le test
+# isinstance se fait au moment du hachage : une classe déclarée après la
+# décoration d'une fonction mémoïsée est prise en compte.
+class _Versioned(abc.ABC):
+    pass
+
+
+# Décorateur de classe : les instances seront hachées par (nom de classe, version)
+# dans les fonctions mémoïsées
+def versioned(cls):
+    _Versioned.register(cls)
+    return cls
+
+
+def _version_token(obj):
+    return type(obj).__name__, obj.version
+
+
+def _hash_funcs(kwargs):
+    return {_Versioned: _version_token, **kwargs.get("hash_funcs", {})}
+
+
+@versioned
+@dataclass(frozen=True)
+class Dataset:
+    name: str
+    version: str
+    df: pd.DataFrame = field(repr=False, compare=False)
+    issues: tuple = field(default=(), compare=False)  # Anomalies relevées à l'import
+
+
+# Équivalents de st.cache_data (copie par appel) et st.cache_resource (objet
+# partagé), bornés par le budget mémoire de leur famille (efe.cache, family=...),
+# où les objets versionnés (Dataset, agrégats...) sont hachés par leur version. Les
+# appels et recalculs sont comptés pour le panneau de profilage.
+def cache_data(func=None, **kwargs):
+    if func is None:
+        return functools.partial(cache_data, **kwargs)
+    kwargs["hash_funcs"] = _hash_funcs(kwargs)
+    return instrument_cache(functools.partial(memoize, copy=True), func, **kwargs)
+
+
+def cache_resource(func=None, **kwargs):
+    if func is None:
+        return functools.partial(cache_resource, **kwargs)
+    kwargs["hash_funcs"] = _hash_funcs(kwargs)
+    return instrument_cache(functools.partial(memoize, copy=False), func, **kwargs)
@@ -0,0 +1,95 @@
+# Dimension établissement, commune à tous les onglets
+#
+# Les noms d'établissement sont rapprochés sans tenir compte de la casse, des
+# accents ni des espaces : toutes les variantes d'un même nom reçoivent le même
+# identifiant entier et le même nom affiché (la variante la plus fréquente). Dans
+# chaque onglet, la colonne établissement devient une catégorie dont les codes sont
+# ces identifiants : filtres, regroupements et jointures entre onglets portent sur
+# des entiers.
+import hashlib
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from efe.dataset import Dataset, versioned
+
+
+# Clé de rapprochement d'un nom : espaces, casse et accents ignorés
+def normalize_key(name):
+    decomposed = unicodedata.normalize("NFKD", " ".join(str(name).split()))
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+@versioned
+class Etablissements:
+    def __init__(self, datasets):
+        # Nombre de lignes de chaque variante, tous onglets confondus
+        counts = pd.concat([
+            dataset.df["établissement"].astype(str).value_counts() for dataset in datasets
+        ]).groupby(level=0).sum()
+        variants = pd.DataFrame({"variante": counts.index, "lignes": counts.to_numpy()})
+        variants["clé"] = variants["variante"].map(normalize_key)
+
+        # Nom affiché : variante la plus fréquente (puis la première dans l'ordre alphabétique)
+        canonical = (
+            variants.sort_values(["lignes", "variante"], ascending=[False, True])
+            .drop_duplicates("clé")
+            .set_index("clé")["variante"]
+        )
+        names = sorted(canonical)
+        self.table = pd.DataFrame({"id": np.arange(len(names), dtype="int32"), "nom": names})
+        self.dtype = pd.CategoricalDtype(names)
+
+        ids = pd.Series(self.table["id"].to_numpy(), index=names)
+        self._ids_by_key = {key: int(ids[name]) for key, name in canonical.items()}
+        self._ids_by_variant = {
+            variant: self._ids_by_key[key] for variant, key in zip(variants["variante"], variants["clé"])
+        }
+        self.version = hashlib.sha256(
+            repr(sorted(self._ids_by_variant.items())).encode() + repr(names).encode()
+        ).hexdigest()[:16]
+
+        # Établissements présents dans chaque onglet (listes des sélecteurs)
+        self._options = {
+            dataset.name: [names[i] for i in sorted(set(self.ids(dataset.df["établissement"])))]
+            for dataset in datasets
+        }
+
+    # Identifiant d'un établissement (quelle que soit la variante du nom), None s'il est inconnu
+    def id(self, name):
+        return self._ids_by_key.get(normalize_key(name))
+
+    # Nom affiché d'un identifiant
+    def name(self, id):
+        return self.dtype.categories[id]
+
+    # Identifiants d'une colonne de noms (une recherche par nom distinct, et non par ligne)
+    def ids(self, values):
+        values = values.astype("category")
+        lookup = np.array(
+            [self._ids_by_variant.get(str(variant), -1) for variant in values.cat.categories] + [-1],
+            dtype="int32"
+        )
+        return lookup[values.cat.codes.to_numpy()]
+
+    # Colonne de noms convertie en catégorie de la dimension (codes = identifiants)
+    def encode(self, values):
+        return self.decode(self.ids(values))
+
+    # Identifiants convertis en catégorie de la dimension
+    def decode(self, ids):
+        return pd.Categorical.from_codes(ids, dtype=self.dtype)
+
+    # Établissements présents dans un onglet, par ordre alphabétique
+    def options(self, sheet):
+        return self._options.get(sheet, [])
+
+    # Onglet dont la colonne établissement est rattachée à la dimension
+    def conform(self, dataset):
+        df = dataset.df.assign(établissement=self.encode(dataset.df["établissement"]))
+        return Dataset(dataset.name, f"{dataset.version}@{self.version}", df, dataset.issues)
+
+
+def build_etablissements(datasets):
+    return Etablissements(datasets)
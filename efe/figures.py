@@ -0,0 +1,78 @@
+# Gabarits de graphiques Plotly
+#
+# Construire une figure avec plotly.express (création et validation de chaque
+# trace) coûte bien plus cher que de la sérialiser. Les figures sont donc
+# construites une seule fois par version des données, sans l'établissement
+# sélectionné, et conservées sous forme sérialisée (dictionnaire), en mémoire et
+# sur disque (un processus redémarré les relit). À chaque interaction, seules
+# les couleurs (et tailles) des marqueurs sont remplacées dans une copie du
+# gabarit avant l'affichage. Pour un classement long, seuls les points de sa
+# fenêtre autour de l'établissement sélectionné sont envoyés au navigateur.
+import base64
+import functools
+
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+from efe.dataset import cache_data
+from efe.profiling import span
+
+
+# Décorateur : la fonction décorée construit une figure à partir d'objets versionnés
+# (Dataset, agrégats, classements...) et de paramètres fixes. Elle renvoie le
+# gabarit sérialisé, mémoïsé par version ; chaque appel en renvoie une copie.
+def figure_template(build):
+    @functools.wraps(build)
+    def template(*args, **kwargs):
+        return build(*args, **kwargs).to_dict()
+    return cache_data(template, family="figures", persist=True)
+
+
+# Valeurs d'un attribut de trace sous forme de tableau (liste, tableau numpy ou
+# encodage binaire de Plotly), None si l'attribut n'est pas un tableau
+def _values(value):
+    if isinstance(value, dict) and "bdata" in value:
+        array = np.frombuffer(base64.b64decode(value["bdata"]), dtype=value["dtype"])
+        if "shape" in value:
+            array = array.reshape([int(size) for size in str(value["shape"]).split(",")])
+        return array
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return np.asarray(value, dtype=None if isinstance(value, np.ndarray) else object)
+    return None
+
+
+# Ne garder que les points rows (positions) des tableaux d'une trace de count points
+def _select_points(attributes, rows, count):
+    for key, value in attributes.items():
+        values = _values(value)
+        if values is not None and len(values) == count:
+            attributes[key] = values[rows]
+        elif isinstance(value, dict) and values is None:
+            _select_points(value, rows, count)  # marker, etc.
+
+
+# Figure prête à afficher à partir d'un gabarit (qui est modifié sur place), avec
+# les couleurs et/ou la taille des marqueurs de la trace donnée remplacées et, si
+# rows est donné, seulement ces points (positions, ex. efe.rankings.window) de la
+# trace. Le gabarit ayant déjà été validé à sa construction, il ne l'est pas à
+# nouveau.
+def patch_figure(template, marker_color=None, marker_size=None, trace=0, rows=None):
+    if marker_color is not None:
+        template["data"][trace].setdefault("marker", {})["color"] = marker_color
+    if marker_size is not None:
+        template["data"][trace].setdefault("marker", {})["size"] = marker_size
+    if rows is not None:
+        points = template["data"][trace]
+        _select_points(points, rows, len(_values(points["x"])))
+    return go.Figure(template, _validate=False)
+
+
+# Afficher une figure (la sérialisation de la figure est mesurée par le profilage,
+# ainsi que sa taille, relevée hors de l'intervalle)
+def plotly_chart(figure, **kwargs):
+    with span("rendu graphique", titre=figure.layout.title.text) as details:
+        chart = st.plotly_chart(figure, **kwargs)
+    if details is not None:
+        details["octets"] = len(figure.to_json())
+    return chart
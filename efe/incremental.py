@@ -0,0 +1,62 @@
+# Agrégation incrémentale lors de l'actualisation des onglets
+#
+# Quand un onglet change (nouvelle session, correction tardive), ses lignes sont
+# comparées à celles de la version précédente par empreinte de ligne : seules les
+# lignes ajoutées ou retirées (une ligne modifiée est retirée puis ajoutée) sont
+# agrégées et reportées dans la table d'agrégats précédente. Le coût d'une
+# actualisation dépend de l'écart, et non de l'historique des sessions.
+import threading
+
+import pandas as pd
+
+from efe.aggregates import delta
+
+
+# Lignes ajoutées et retirées entre deux versions d'un onglet (les lignes en double
+# sont comptées autant de fois qu'elles apparaissent)
+def row_changes(old_df, new_df):
+    old_hashes = pd.util.hash_pandas_object(old_df, index=False)
+    new_hashes = pd.util.hash_pandas_object(new_df, index=False)
+    # Rang de chaque ligne parmi les lignes identiques, comparé au nombre de copies
+    # présentes dans l'autre version
+    old_rank = old_hashes.groupby(old_hashes).cumcount().to_numpy()
+    new_rank = new_hashes.groupby(new_hashes).cumcount().to_numpy()
+    old_counts = old_hashes.value_counts()
+    new_counts = new_hashes.value_counts()
+    added = new_rank >= old_counts.reindex(new_hashes.to_numpy(), fill_value=0).to_numpy()
+    removed = old_rank >= new_counts.reindex(old_hashes.to_numpy(), fill_value=0).to_numpy()
+    return new_df[added], old_df[removed]
+
+
+class IncrementalAggregator:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._datasets = None
+        self._aggregates = None
+
+    # Agrégats des onglets donnés, rattachés à la dimension établissement donnée.
+    # build() construit la table complète de ces mêmes
+    # onglets ; elle n'est appelée qu'au premier chargement (ou si la liste des
+    # onglets change). Une table construite pour une autre version des onglets est
+    # refusée : les écarts suivants seraient reportés sur de mauvaises lignes.
+    def update(self, datasets, etablissements, build):
+        datasets = {dataset.name: dataset for dataset in datasets}
+        version = "+".join(dataset.version for dataset in datasets.values())
+        with self._lock:
+            if self._aggregates is not None and self._aggregates.version == version:
+                return self._aggregates
+            if self._aggregates is None or list(datasets) != list(self._datasets):
+                aggregates = build()
+                if aggregates.version != version:
+                    raise ValueError(
+                        f"Agrégats construits pour la version {aggregates.version}, attendue {version}"
+                    )
+            else:
+                changes = [
+                    delta(name, *row_changes(self._datasets[name].df, dataset.df))
+                    for name, dataset in datasets.items()
+                    if dataset.version != self._datasets[name].version
+                ]
+                aggregates = self._aggregates.merge(pd.concat(changes), version, etablissements)
+            self._datasets, self._aggregates = datasets, aggregates
+            return aggregates
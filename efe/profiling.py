@@ -0,0 +1,233 @@
+# Profilage des pages (panneau de débogage facultatif)
+#
+# Activé par ?debug=1 dans l'adresse de la page ou par EFE_PROFILE=1. Chaque
+# exécution d'une page enregistre alors des intervalles nommés (chargement,
+# agrégats, classements, construction et rendu des figures avec la taille de la
+# figure envoyée au navigateur, sections de la page), imbriqués les uns dans les
+# autres. Une exécution limitée aux sections relancées par un changement
+# d'établissement (fragments) a sa propre trace, ouverte par la première section.
+# Les fonctions mémoïsées (cache_data / cache_resource de efe.dataset) comptent
+# leurs appels et leurs recalculs ; le nombre et la taille de leurs entrées, ainsi
+# que l'état de chaque famille de caches (efe.cache), sont relevés à l'affichage du
+# panneau. Le panneau de la barre latérale (un fragment, relancé avec les sections)
+# affiche ces mesures et permet de les télécharger en JSON ou au format Chrome trace
+# (chrome://tracing, Perfetto).
+#
+# Désactivé, le profilage se limite à deux compteurs par appel mémoïsé.
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from efe.cache import family_stats, function_usage
+
+PANEL_KEY = "profilage"
+_PAGE_KEY = "_profilage_page"
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_cache_stats = {}
+
+
+@dataclass
+class CacheStats:
+    name: str
+    calls: int = 0
+    misses: int = 0
+
+    @property
+    def hits(self):
+        return self.calls - self.misses
+
+
+class Trace:
+    def __init__(self, page, fragments=None):
+        self.page = page
+        self.fragments = fragments  # Fragments relancés par l'exécution, None pour une exécution complète
+        self.origin = time.perf_counter()
+        self.events = []
+        self.depth = 0
+
+
+def enabled():
+    return os.environ.get("EFE_PROFILE") == "1" or st.query_params.get("debug") == "1"
+
+
+# Commencer le profilage d'une exécution de page (en tête de page)
+def start_trace(page):
+    _local.trace = None
+    if enabled():
+        st.session_state[_PAGE_KEY] = page
+        _local.trace = Trace(page)
+
+
+def _current():
+    return getattr(_local, "trace", None)
+
+
+# Exécution limitée à des fragments : ouvrir sa trace, ou rejoindre celle ouverte
+# par une section précédente de la même exécution
+def _attach_fragment_run():
+    ctx = get_script_run_ctx()
+    fragments = ctx.fragment_ids_this_run if ctx is not None else None
+    if not fragments:
+        return
+    trace = _current()
+    if trace is not None and trace.fragments is fragments:
+        return
+    _local.trace = None
+    if enabled():
+        _local.trace = Trace(st.session_state.get(_PAGE_KEY, "page"), fragments)
+
+
+# Intervalle nommé : durée du bloc, enregistrée si le profilage est actif. Le bloc
+# reçoit les détails de l'intervalle (à compléter), ou None si le profilage est inactif.
+@contextmanager
+def span(name, **args):
+    trace = _current()
+    if trace is None:
+        yield None
+        return
+    start = time.perf_counter()
+    trace.depth += 1
+    try:
+        yield args
+    finally:
+        trace.depth -= 1
+        trace.events.append({
+            "name": name,
+            "start": start - trace.origin,
+            "duration": time.perf_counter() - start,
+            "depth": trace.depth,
+            "thread": threading.current_thread().name,
+            "args": args,
+        })
+
+
+# Décorateur : chaque appel de la fonction est un intervalle nommé (le premier
+# appel d'une exécution limitée à des fragments ouvre la trace de cette exécution)
+def profiled(name):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            _attach_fragment_run()
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Appliquer un décorateur de mémoïsation (efe.cache.memoize) en comptant les
+# appels et les recalculs de la fonction
+def instrument_cache(decorator, func, **kwargs):
+    name = f"{Path(inspect.unwrap(func).__code__.co_filename).stem}.{func.__qualname__}"
+    with _stats_lock:
+        stats = _cache_stats.setdefault(name, CacheStats(name))
+
+    @functools.wraps(func)
+    def compute(*args, **kw):
+        with _stats_lock:
+            stats.misses += 1
+        with span(f"calcul {func.__name__}"):
+            return func(*args, **kw)
+
+    cached = decorator(compute, name=name, **kwargs)
+
+    @functools.wraps(func)
+    def call(*args, **kw):
+        with _stats_lock:
+            stats.calls += 1
+        with span(func.__name__, cache=True):
+            return cached(*args, **kw)
+
+    call.clear = cached.clear
+    return call
+
+
+def cache_stats():
+    usage = function_usage()
+    with _stats_lock:
+        return pd.DataFrame([
+            {
+                "fonction": stats.name,
+                "appels": stats.calls,
+                "succès": stats.hits,
+                "recalculs": stats.misses,
+                "entrées": usage.get(stats.name, (0, 0))[0],
+                "taille (Ko)": round(usage.get(stats.name, (0, 0))[1] / 1024, 1),
+            }
+            for stats in _cache_stats.values() if stats.calls
+        ])
+
+
+def to_json(trace):
+    return json.dumps({
+        "page": trace.page,
+        "spans": trace.events,
+        "caches": cache_stats().to_dict("records"),
+        "familles": family_stats().to_dict("records"),
+    }, ensure_ascii=False, indent=2, default=str)
+
+
+# Format Chrome trace (événements complets « X », temps en microsecondes)
+def to_chrome_trace(trace):
+    threads = {}
+    events = [
+        {
+            "name": event["name"],
+            "ph": "X",
+            "ts": round(event["start"] * 1e6, 1),
+            "dur": round(event["duration"] * 1e6, 1),
+            "pid": 1,
+            "tid": threads.setdefault(event["thread"], len(threads) + 1),
+            "args": event["args"],
+        }
+        for event in trace.events
+    ]
+    events += [
+        {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": thread}}
+        for thread, tid in threads.items()
+    ]
+    return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, default=str)
+
+
+# Panneau de profilage (dans la barre latérale), affiché seulement si le profilage
+# est actif. C'est un fragment relancé avec les sections (voir select_etablissement) :
+# il affiche la trace de la dernière exécution, complète ou limitée aux sections.
+@st.fragment(key=PANEL_KEY)
+def display_profiling_panel():
+    trace = _current()
+    if trace is None:
+        return
+    with st.expander("Profilage", expanded=False):
+        events = sorted(trace.events, key=lambda event: event["start"])
+        total = max((event["start"] + event["duration"] for event in events), default=0.0)
+        executed = "de la page" if trace.fragments is None else "des sections relancées"
+        st.caption(f"Exécution {executed} : {total * 1000:.0f} ms (jusqu'au panneau)")
+        st.dataframe(pd.DataFrame([
+            {
+                "intervalle": "  " * event["depth"] + event["name"],
+                "durée (ms)": round(event["duration"] * 1000, 1),
+                "taille (Ko)": round(event["args"]["octets"] / 1024, 1) if "octets" in event["args"] else None,
+            }
+            for event in events
+        ]), hide_index=True)
+        st.dataframe(family_stats(), hide_index=True)
+        st.dataframe(cache_stats(), hide_index=True)
+        st.download_button(
+            "Télécharger (JSON)", to_json(trace), file_name=f"profil-{trace.page}.json",
+            mime="application/json", on_click="ignore"
+        )
+        st.download_button(
+            "Télécharger (Chrome trace)", to_chrome_trace(trace), file_name=f"trace-{trace.page}.json",
+            mime="application/json", on_click="ignore"
+        )
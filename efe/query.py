@@ -0,0 +1,130 @@
+# Moteur de requêtes SQL embarqué (DuckDB)
+#
+# Les onglets sont exposés une seule fois par version dans une base DuckDB en
+# mémoire, sans copie : chaque DataFrame est enregistré auprès de DuckDB et lu sur
+# place (mémoire partagée avec les onglets, projetés en mémoire en mode lot), au
+# travers d'une vue par onglet et d'une vue longue des notes (une ligne par note).
+# Les établissements y sont désignés par leur identifiant entier dans la dimension
+# établissement. Les agrégats et les filtres
+# des pages sont des requêtes paramétrées exécutées par le moteur colonnaire, qui
+# restent rapides lorsque les onglets contiennent une ligne par candidat.
+import duckdb
+
+from efe.aggregates import EPREUVES, KEYS, NO_SPECIALITY, SCALE
+from efe.dataset import Dataset, versioned
+from efe.schema import weight_columns
+
+
+def _identifier(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _literal(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _table(name):
+    return _identifier(f"onglet_{name}")
+
+
+# Nom sous lequel le DataFrame d'un onglet est enregistré auprès de DuckDB
+def _frame(name):
+    return f"_donnees_{name}"
+
+
+@versioned
+class QueryEngine:
+    def __init__(self, datasets, etablissements):
+        self.version = "+".join(dataset.version for dataset in datasets)
+        self.etablissements = etablissements
+        self._datasets = {dataset.name: dataset for dataset in datasets}
+        self._frames = {}  # Nom d'enregistrement → DataFrame lu par les vues
+        self._connection = duckdb.connect()
+
+        for dataset in datasets:
+            self._load(dataset)
+
+        # Vue longue des notes : notes stockées en float32, repassées en double
+        # précision et arrondies à 4 décimales pour retrouver les valeurs saisies ;
+        # somme et nombre de notes représentées par chaque ligne (tout un groupe pour
+        # un onglet lu en flux, voir weight_columns)
+        selects = []
+        for dataset in datasets:
+            speciality = "CAST(spécialité AS VARCHAR)" if "spécialité" in dataset.df.columns \
+                else _literal(NO_SPECIALITY)
+            for column, épreuve in EPREUVES[dataset.name].items():
+                note = f"round_even(CAST({_identifier(column)} AS DOUBLE), 4)"
+                somme, nombre = weight_columns(column)
+                if somme in dataset.df.columns:
+                    weights = f"{_identifier(somme)} AS somme, {_identifier(nombre)} AS nombre"
+                else:
+                    weights = f"{note} AS somme, CAST({note} IS NOT NULL AS BIGINT) AS nombre"
+                selects.append(
+                    f"SELECT {_literal(épreuve)} AS épreuve, session, établissement, {speciality} AS spécialité, "
+                    f"{note} AS note, {weights} FROM {_table(dataset.name)}"
+                )
+        self._connection.execute("CREATE VIEW notes AS " + " UNION ALL ".join(selects))
+
+    # Exposer un onglet par une vue, l'établissement remplacé par son identifiant (les
+    # autres colonnes sont partagées avec l'onglet, sans copie)
+    def _load(self, dataset):
+        frame = dataset.df.assign(établissement=self.etablissements.ids(dataset.df["établissement"]))
+        self._frames[_frame(dataset.name)] = frame
+        self._connection.register(_frame(dataset.name), frame)
+        self._connection.execute(
+            f"CREATE VIEW {_table(dataset.name)} AS SELECT * FROM {_identifier(_frame(dataset.name))}"
+        )
+
+    # Curseur sur la base (un par requête : le moteur est partagé entre les sessions).
+    # Les DataFrames enregistrés sont propres à chaque connexion : ils sont
+    # réenregistrés sur le curseur (sans copie) pour que les vues les retrouvent.
+    def _cursor(self):
+        cursor = self._connection.cursor()
+        for name, frame in self._frames.items():
+            cursor.register(name, frame)
+        return cursor
+
+    # Exécuter une requête paramétrée ; la colonne établissement est rendue sous forme
+    # de noms
+    def _query(self, sql, parameters=()):
+        df = self._cursor().execute(sql, list(parameters)).df()
+        if "établissement" in df.columns:
+            df["établissement"] = self.etablissements.decode(df["établissement"])
+        return df
+
+    # Somme et nombre de notes, et nombre de lignes, par épreuve × session ×
+    # établissement × spécialité (les notes manquantes sont ignorées, comme par
+    # mean()). Les sommes sont exactes : notes cumulées en dix-millièmes entiers.
+    def aggregate(self):
+        return self._query(
+            f"SELECT {', '.join(KEYS)}, "
+            f"coalesce(sum(CAST(round_even(somme * {SCALE}, 0) AS BIGINT)), 0) / {SCALE} AS somme, "
+            f"coalesce(sum(nombre), 0) AS nombre, count(*) AS lignes "
+            f"FROM notes GROUP BY {', '.join(KEYS)}"
+        )
+
+    # Lignes d'un onglet égales aux valeurs données (ex. rows("dnb", session=2024)),
+    # dans l'ordre de l'onglet (DuckDB conserve l'ordre de lecture en l'absence
+    # d'ORDER BY : preserve_insertion_order), sous forme de Dataset à la version dérivée
+    def rows(self, name, **conditions):
+        clauses, parameters = [], []
+        for column, value in sorted(conditions.items()):
+            if column == "établissement":
+                value = self.etablissements.id(value)
+            clauses.append(f"{_identifier(column)} = ?")
+            parameters.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        df = self._query(f"SELECT * FROM {_table(name)}{where}", parameters)
+        dataset = self._datasets[name]
+        token = ",".join(f"{column}={value!r}" for column, value in sorted(conditions.items()))
+        return Dataset(name, f"{dataset.version}[{token}]", df[list(dataset.df.columns)], dataset.issues)
+
+    # Mémoire occupée par la base DuckDB (comptée dans le budget du cache ; les
+    # onglets enregistrés sont comptés avec les onglets)
+    def __sizeof__(self):
+        used, = self._connection.cursor().execute("SELECT sum(memory_usage_bytes) FROM duckdb_memory()").fetchone()
+        return object.__sizeof__(self) + int(used or 0)
+
+
+def build_engine(datasets, etablissements):
+    return QueryEngine(datasets, etablissements)
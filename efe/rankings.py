@@ -0,0 +1,123 @@
+# Classements de tous les établissements, pour toutes les épreuves
+#
+# Les rangs sont calculés en une seule passe vectorisée sur la table d'agrégats,
+# pour chaque épreuve × session × spécialité, ainsi que pour les scores composés
+# (moyenne globale BAC, score total DNB, moyenne EAF). Le classement d'une épreuve
+# et le rang d'un établissement se lisent ensuite directement.
+#
+# Ex aequo : les établissements de même moyenne partagent le meilleur rang
+# (1, 2, 2, 4) et sont ordonnés par nom dans les classements.
+import pandas as pd
+
+from efe.aggregates import NO_SPECIALITY
+from efe.dataset import versioned
+
+# Scores composés : épreuves combinées, combinaison et arrondi appliqué avant le classement
+OVERALL_BAC = "Moyenne globale BAC"
+TOTAL_DNB = "Score total DNB"
+AVERAGE_EAF = "Moyenne EAF"
+COMPOSITES = {
+    OVERALL_BAC: (["Philosophie", "EDS", "Grand Oral"], "mean", 2),
+    TOTAL_DNB: ([
+        "Français (sur 100)", "Hist. Géo.EMC (sur 50)", "Mathématiques (sur 100)",
+        "Sciences (sur 50)", "SO de projet (sur 100)"
+    ], "sum", 0),
+    AVERAGE_EAF: (["écrit", "oral"], "mean", 2),
+}
+
+GROUP = ["épreuve", "session", "spécialité"]
+
+# Classements fenêtrés : au-delà de WINDOW_THRESHOLD établissements, un graphique de
+# classement n'affiche que les WINDOW_TOP premiers, les WINDOW_BOTTOM derniers et
+# WINDOW_AROUND rangs de part et d'autre de l'établissement sélectionné
+WINDOW_THRESHOLD = 30
+WINDOW_TOP = 10
+WINDOW_BOTTOM = 5
+WINDOW_AROUND = 3
+
+
+# Moyennes des scores composés par session et établissement
+def _composites(pooled):
+    wide = pooled.pivot(index=["session", "établissement"], columns="épreuve", values="moyenne")
+    frames = []
+    for name, (epreuves, how, decimals) in COMPOSITES.items():
+        columns = wide[[epreuve for epreuve in epreuves if epreuve in wide.columns]]
+        present = columns.notna().any(axis=1)
+        scores = getattr(columns[present], how)(axis=1).round(decimals)
+        frames.append(scores.rename("moyenne").reset_index().assign(épreuve=name))
+    return pd.concat(frames, ignore_index=True)
+
+
+# Moyennes et rangs de tous les classements (colonnes épreuve, session, spécialité,
+# établissement, moyenne, rang), dans l'ordre des classements
+def _scores(aggregates):
+    # Moyennes par établissement (toutes spécialités confondues), par spécialité,
+    # et scores composés
+    pooled = aggregates.level("établissement")["moyenne"].reset_index()
+    detailed = aggregates.level("établissement", "spécialité")["moyenne"].reset_index()
+    detailed = detailed[detailed["spécialité"] != NO_SPECIALITY]
+    composites = _composites(pooled)
+    scores = pd.concat([pooled, composites], ignore_index=True)
+    scores["spécialité"] = NO_SPECIALITY
+    scores = pd.concat([scores, detailed], ignore_index=True)
+
+    scores["rang"] = (
+        scores.groupby(GROUP, observed=True)["moyenne"]
+        .rank(method="min", ascending=False)
+        .astype("Int64")
+    )
+    scores = scores.sort_values(GROUP + ["rang", "établissement"], na_position="last")
+    return scores[GROUP + ["établissement", "moyenne", "rang"]].reset_index(drop=True)
+
+
+@versioned
+class Rankings:
+    def __init__(self, aggregates):
+        self._index(_scores(aggregates), aggregates.version)
+
+    # Classements relus depuis leur table (lot de données compilé)
+    @classmethod
+    def from_scores(cls, scores, version):
+        rankings = cls.__new__(cls)
+        rankings._index(scores, version)
+        return rankings
+
+    def _index(self, scores, version):
+        self.version = version
+        self.scores = scores
+        self._rankings = {
+            key: group[["établissement", "moyenne", "rang"]].reset_index(drop=True)
+            for key, group in scores.groupby(GROUP, observed=True, sort=False)
+        }
+        self._ranks = scores.set_index(GROUP + ["établissement"])["rang"].sort_index()
+
+    # Classement d'une épreuve pour une session (colonnes établissement, moyenne, rang),
+    # du premier au dernier. Ne pas modifier le DataFrame renvoyé.
+    def ranking(self, épreuve, session, spécialité=NO_SPECIALITY):
+        ranking = self._rankings.get((épreuve, session, spécialité))
+        if ranking is None:
+            return pd.DataFrame({"établissement": [], "moyenne": [], "rang": []})
+        return ranking
+
+    # Rang d'un établissement, ou None s'il n'est pas classé
+    def rank(self, épreuve, session, établissement, spécialité=NO_SPECIALITY):
+        rank = self._ranks.get((épreuve, session, spécialité, établissement))
+        return None if rank is None or pd.isna(rank) else int(rank)
+
+
+# Positions (dans l'ordre du classement) des lignes à afficher pour un classement
+# fenêtré autour de l'établissement donné, ou None si le classement est assez court
+# pour être affiché en entier
+def window(ranking, établissement, top=WINDOW_TOP, bottom=WINDOW_BOTTOM, around=WINDOW_AROUND,
+           threshold=WINDOW_THRESHOLD):
+    count = len(ranking)
+    if count <= threshold:
+        return None
+    positions = set(range(min(top, count))) | set(range(max(count - bottom, 0), count))
+    for position in (ranking["établissement"] == établissement).to_numpy().nonzero()[0]:
+        positions.update(range(max(position - around, 0), min(position + around + 1, count)))
+    return sorted(positions)
+
+
+def build_rankings(aggregates):
+    return Rankings(aggregates)
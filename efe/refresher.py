@@ -0,0 +1,122 @@
+# Actualisation des onglets en arrière-plan (stale-while-revalidate)
+#
+# La dernière version valide de chaque onglet est servie immédiatement. Lorsqu'elle
+# a dépassé l'âge maximal du magasin local, une actualisation est lancée en
+# arrière-plan sans bloquer les sessions. Les demandes simultanées pour un même
+# onglet partagent un seul téléchargement en cours.
+#
+# Chaque onglet lu passe par prepare(nom, DataFrame, métadonnées de la copie locale), qui
+# renvoie l'objet servi aux pages.
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+
+@dataclass
+class SheetEntry:
+    value: object = None
+    checked_at: float = 0.0    # Dernière revalidation réussie auprès de la source
+    attempted_at: float = 0.0  # Dernière tentative de revalidation
+    error: str = None          # Message de la dernière erreur, None si elle a réussi
+
+
+class SheetRefresher:
+    def __init__(self, store, sheets, prepare=None):
+        self.store = store
+        self.sheets = sheets
+        self.prepare = prepare or (lambda name, df, metadata: df)
+        self._lock = threading.Lock()
+        self._entries = {name: SheetEntry() for name in sheets}
+        self._inflight = {}
+        self._executor = ThreadPoolExecutor(max_workers=len(sheets), thread_name_prefix="efe-refresh")
+
+    def _is_stale(self, entry):
+        return time.time() - max(entry.checked_at, entry.attempted_at) >= self.store.max_age
+
+    # Lancer une tâche pour un onglet, sauf si une tâche est déjà en cours pour lui
+    # (à appeler avec le verrou)
+    def _submit(self, name, task):
+        future = self._inflight.get(name)
+        if future is None:
+            future = self._executor.submit(self._run, name, task)
+            self._inflight[name] = future
+        return future
+
+    def _run(self, name, task):
+        try:
+            task(name)
+        finally:
+            with self._lock:
+                del self._inflight[name]
+                entry = self._entries[name]
+                # Copie locale périmée au démarrage : la revalider aussitôt en arrière-plan
+                if entry.value is not None and self._is_stale(entry):
+                    self._submit(name, self._revalidate)
+
+    # Premier chargement : copie locale même périmée si elle existe, sinon la source
+    def _load(self, name):
+        try:
+            df = self.store.read(name, self.sheets[name], allow_stale=True)
+            metadata = self.store.metadata(name)
+            df = self.prepare(name, df, metadata)
+        except Exception as exc:
+            with self._lock:
+                self._entries[name].error = f"{type(exc).__name__}: {exc}"
+            raise
+        with self._lock:
+            entry = self._entries[name]
+            entry.value = df
+            entry.checked_at = metadata["checked_at"]
+            entry.error = None
+
+    # Revalidation : la version servie n'est remplacée que si le contenu a changé
+    # et que le nouveau contenu a pu être lu
+    def _revalidate(self, name):
+        attempted_at = time.time()
+        try:
+            changed = self.store.refresh(name, self.sheets[name])
+            df = None
+            if changed:
+                df = self.prepare(name, self.store.read_local(name), self.store.metadata(name))
+        except Exception as exc:
+            with self._lock:
+                entry = self._entries[name]
+                entry.attempted_at = attempted_at
+                entry.error = f"{type(exc).__name__}: {exc}"
+            return
+        with self._lock:
+            entry = self._entries[name]
+            if df is not None:
+                entry.value = df
+            entry.checked_at = entry.attempted_at = attempted_at
+            entry.error = None
+
+    # Renvoyer tous les onglets : seuls les onglets jamais chargés font attendre
+    # l'appelant, les onglets périmés sont actualisés en arrière-plan
+    def get(self):
+        waiting = []
+        with self._lock:
+            for name, entry in self._entries.items():
+                if entry.value is None:
+                    waiting.append(self._submit(name, self._load))
+                elif self._is_stale(entry):
+                    self._submit(name, self._revalidate)
+        for future in waiting:
+            future.result()
+        with self._lock:
+            return {name: entry.value for name, entry in self._entries.items()}
+
+    # État de chaque onglet : âge de la version servie, dernière erreur, actualisation en cours
+    def status(self):
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    "onglet": name,
+                    "age": now - entry.checked_at if entry.value is not None else None,
+                    "erreur": entry.error,
+                    "en_cours": name in self._inflight,
+                }
+                for name, entry in self._entries.items()
+            ]
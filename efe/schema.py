@@ -0,0 +1,102 @@
+# Schéma de chaque onglet à l'import
+#
+# Les noms de colonnes sont normalisés (espaces superflus) puis vérifiés : une
+# colonne attendue manquante est une erreur. Les identifiants (établissement,
+# spécialité) sont stockés en catégories, la session en petit entier et les notes
+# en float32. Un onglet lu en flux (une ligne par groupe, voir efe.streaming) garde
+# aussi, pour chaque note, la somme et le nombre de notes du groupe. Les lignes
+# inutilisables (établissement ou session absents ou invalides) sont écartées et
+# les notes illisibles remplacées par NaN ; ces anomalies sont signalées avec
+# l'onglet.
+from dataclasses import dataclass
+
+import pandas as pd
+
+SESSION_DTYPE = "int16"
+SCORE_DTYPE = "float32"
+
+
+class SchemaError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class SheetSchema:
+    categories: tuple  # Identifiants textuels, stockés en catégories
+    scores: tuple      # Colonnes de notes
+
+    @property
+    def columns(self):
+        return ("session",) + self.categories + self.scores
+
+
+# Colonnes de somme et de nombre de notes d'une colonne de notes, dans un onglet lu en
+# flux : les moyennes par groupe sont pondérées par ces nombres aux niveaux supérieurs
+def weight_columns(score):
+    return f"{score} (somme)", f"{score} (nombre)"
+
+
+SCHEMAS = {
+    "philosophie": SheetSchema(("établissement",), ("moyenne",)),
+    "eds": SheetSchema(("établissement", "spécialité"), ("moyenne",)),
+    "go": SheetSchema(("établissement",), ("moyenne",)),
+    "dnb": SheetSchema(("établissement",), (
+        "Français (sur 100)", "Hist. Géo.EMC (sur 50)", "Mathématiques (sur 100)",
+        "Sciences (sur 50)", "SO de projet (sur 100)", "Socle Commun (sur 400)",
+        "DNL Hist. Géo. arabe (sur 50)", "Langue de la section (sur 50)"
+    )),
+    "eaf": SheetSchema(("établissement",), ("écrit", "oral")),
+}
+
+
+def normalize_label(label):
+    return " ".join(str(label).split())
+
+
+# Appliquer le schéma d'un onglet. Renvoie le DataFrame typé et la liste des
+# anomalies rencontrées (lignes écartées, notes illisibles).
+def apply_schema(name, df):
+    schema = SCHEMAS[name]
+    df = df.rename(columns=normalize_label)
+    missing = [column for column in schema.columns if column not in df.columns]
+    if missing:
+        raise SchemaError(f"Onglet {name} : colonnes manquantes {missing}")
+
+    issues = []
+    typed = {}
+    for column in schema.categories:
+        values = df[column].astype("string").map(normalize_label, na_action="ignore")
+        typed[column] = values.mask(values == "")
+
+    session = pd.to_numeric(df["session"], errors="coerce")
+    invalid = session.isna() | (session != session.round())
+    for column in schema.categories:
+        invalid |= typed[column].isna()
+    if invalid.any():
+        issues.append(f"{int(invalid.sum())} ligne(s) sans établissement ou session valide écartée(s)")
+    typed["session"] = session
+
+    for column in schema.scores:
+        scores = pd.to_numeric(df[column], errors="coerce")
+        unreadable = scores.isna() & df[column].notna() & ~invalid
+        if unreadable.any():
+            issues.append(f"{int(unreadable.sum())} note(s) illisible(s) dans « {column} »")
+        typed[column] = scores
+
+    weights = {}
+    for score in schema.scores:
+        somme, nombre = weight_columns(score)
+        if somme in df.columns and nombre in df.columns:
+            weights.update({somme: "float64", nombre: "int64"})
+            typed[somme], typed[nombre] = df[somme], df[nombre]
+
+    keep = ~invalid
+    columns = list(schema.columns) + list(weights)
+    result = pd.DataFrame({column: typed[column][keep] for column in columns}).reset_index(drop=True)
+    result = result.astype({
+        "session": SESSION_DTYPE,
+        **{column: "category" for column in schema.categories},
+        **{column: SCORE_DTYPE for column in schema.scores},
+        **weights,
+    })
+    return result, issues
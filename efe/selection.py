@@ -0,0 +1,53 @@
+# Établissement mis en surbrillance, choisi dans la barre latérale
+#
+# Chaque page est découpée en sections (fragments Streamlit). Changer
+# d'établissement ne relance que les sections qui en dépendent, désignées par
+# leur clé de fragment, et non toute la page : les sections indépendantes de la
+# sélection (« Résultats tout établissements ») ne sont pas réexécutées.
+#
+# Lorsque les établissements sont nombreux, les graphiques de classement sont
+# fenêtrés autour de l'établissement sélectionné (efe.rankings.window) ; un
+# interrupteur de la barre latérale permet d'afficher les classements complets.
+import streamlit as st
+
+from efe.profiling import PANEL_KEY
+from efe.rankings import WINDOW_THRESHOLD, window
+
+KEY = "etablissement"
+FULL_RANKINGS_KEY = "classements_complets"
+
+
+# Afficher le sélecteur d'établissement (et, si la liste est longue, l'interrupteur
+# des classements complets). sections : clés des fragments à relancer lorsque la
+# sélection change ; le panneau de profilage est relancé après elles.
+def select_etablissement(etablissements, sections, label="Choisissez un établissement à mettre en surbrillance :"):
+    sections = list(sections) + [PANEL_KEY]
+    selected = st.selectbox(
+        label,
+        etablissements,
+        key=KEY,
+        on_change=st.rerun,
+        args=(sections,)
+    )
+    if len(etablissements) > WINDOW_THRESHOLD:
+        st.toggle(
+            "Classements complets",
+            key=FULL_RANKINGS_KEY,
+            help="Sinon, les classements n'affichent que les premiers, les derniers et les voisins de l'établissement sélectionné.",
+            on_change=st.rerun,
+            args=(sections,)
+        )
+    return selected
+
+
+# Établissement sélectionné (à lire dans les sections qui en dépendent)
+def selected_etablissement():
+    return st.session_state[KEY]
+
+
+# Positions des lignes d'un classement à afficher autour de l'établissement
+# sélectionné (patch_figure(..., rows=...)), ou None pour l'afficher en entier
+def ranking_rows(ranking):
+    if st.session_state.get(FULL_RANKINGS_KEY, False):
+        return None
+    return window(ranking, selected_etablissement())
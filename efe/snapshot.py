@@ -0,0 +1,203 @@
+# Cache local des onglets Google Sheets sous forme de fichiers Parquet typés.
+#
+# Chaque onglet est conservé dans un répertoire local (un fichier .parquet et un
+# fichier .json de métadonnées). La copie locale est servie tant qu'elle n'a pas
+# dépassé son âge maximal ; au-delà, la source distante est relue et le fichier
+# Parquet n'est réécrit que si l'empreinte du contenu a changé.
+#
+# Avec chunksize, les onglets à une ligne par candidat sont lus en flux (voir
+# efe.streaming) : la copie locale ne contient alors qu'une ligne par groupe, et
+# l'export n'est analysé que si son empreinte a changé.
+# Une copie écrite dans un format antérieur (FORMAT) est relue auprès de la source.
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+import pandas as pd
+
+from efe.streaming import HashingReader, stream_sheet
+
+GOOGLE_EXPORT_URL = "https://docs.google.com/spreadsheets/d/{file_id}/export?format=csv&gid={gid}"
+
+DEFAULT_SNAPSHOT_DIR = ".cache/snapshots"
+DEFAULT_MAX_AGE = 15 * 60  # Secondes avant de revalider un onglet auprès de la source
+MAX_AGE = float(os.environ.get("EFE_SNAPSHOT_MAX_AGE", DEFAULT_MAX_AGE))
+
+# Format des copies locales (2 : sommes et nombres de notes des onglets lus en flux)
+FORMAT = 2
+
+
+# Source distante : export CSV d'un onglet Google Sheets
+class GoogleSheetSource:
+    def __init__(self, file_id, url_template=GOOGLE_EXPORT_URL, timeout=30):
+        self.file_id = file_id
+        self.url_template = url_template
+        self.timeout = timeout
+
+    # Flux binaire de l'export CSV (à fermer après lecture)
+    def open(self, name, gid):
+        url = self.url_template.format(file_id=self.file_id, gid=gid)
+        return urllib.request.urlopen(url, timeout=self.timeout)
+
+    def fetch(self, name, gid):
+        with self.open(name, gid) as response:
+            return response.read()
+
+    def __repr__(self):
+        return f"GoogleSheetSource({self.file_id!r})"
+
+
+# Source locale : un fichier <onglet>.csv par onglet dans un répertoire
+# (tests, déploiements sans accès réseau)
+class LocalDirectorySource:
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def open(self, name, gid):
+        return open(self.directory / f"{name}.csv", "rb")
+
+    def fetch(self, name, gid):
+        return (self.directory / f"{name}.csv").read_bytes()
+
+    def __repr__(self):
+        return f"LocalDirectorySource({str(self.directory)!r})"
+
+
+# Écriture atomique : on écrit dans un fichier temporaire puis on le renomme
+def _atomic_write(path, write):
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class SnapshotStore:
+    def __init__(self, source, directory=DEFAULT_SNAPSHOT_DIR, max_age=DEFAULT_MAX_AGE, chunksize=None):
+        self.source = source
+        self.directory = Path(directory)
+        self.max_age = max_age
+        self.chunksize = chunksize
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, name):
+        return self.directory / f"{name}.parquet", self.directory / f"{name}.json"
+
+    # Métadonnées de la copie locale (empreinte, date de vérification), ou None
+    def metadata(self, name):
+        data_path, meta_path = self._paths(name)
+        if not data_path.exists() or not meta_path.exists():
+            return None
+        try:
+            return json.loads(meta_path.read_text())
+        except ValueError:
+            return None
+
+    def _write_metadata(self, name, metadata):
+        _, meta_path = self._paths(name)
+        _atomic_write(meta_path, lambda f: f.write(json.dumps(metadata).encode()))
+
+    # Copie locale au format courant
+    def is_current(self, metadata):
+        return metadata is not None and metadata.get("format") == FORMAT
+
+    def is_fresh(self, metadata):
+        return self.is_current(metadata) and time.time() - metadata["checked_at"] < self.max_age
+
+    # Lire la copie locale d'un onglet
+    def read_local(self, name):
+        return pd.read_parquet(self._paths(name)[0])
+
+    # Lire un onglet : copie locale si elle est fraîche (ou si allow_stale et qu'elle
+    # existe au format courant), sinon revalidation auprès de la source
+    def read(self, name, gid, allow_stale=False):
+        metadata = self.metadata(name)
+        if self.is_fresh(metadata) or (allow_stale and self.is_current(metadata)):
+            return self.read_local(name)
+        try:
+            self.refresh(name, gid)
+        except OSError:
+            # Source injoignable : on continue de servir la dernière copie connue
+            if metadata is None:
+                raise
+        return self.read_local(name)
+
+    # Contenu identique à la copie locale (au format courant) : seule la date de
+    # vérification est mise à jour
+    def _unchanged(self, name, metadata, content_hash):
+        if not self.is_current(metadata) or metadata["hash"] != content_hash:
+            return False
+        self._write_metadata(name, {**metadata, "checked_at": time.time()})
+        return True
+
+    # Relire la source et ne réécrire la copie locale que si son contenu a changé.
+    # Renvoie True si le contenu a changé.
+    def refresh(self, name, gid):
+        data_path, _ = self._paths(name)
+        metadata = self.metadata(name)
+        if self.chunksize:
+            # Export recopié dans un fichier temporaire pendant le calcul de son
+            # empreinte : il n'est analysé (en flux) que si le contenu a changé
+            with tempfile.TemporaryFile(dir=self.directory) as spool:
+                with self.source.open(name, gid) as stream:
+                    reader = HashingReader(stream)
+                    shutil.copyfileobj(reader, spool)
+                content_hash = reader.hexdigest()
+                if self._unchanged(name, metadata, content_hash):
+                    return False
+                spool.seek(0)
+                df, _, issues = stream_sheet(name, spool, self.chunksize)
+        else:
+            raw = self.source.fetch(name, gid)
+            content_hash = hashlib.sha256(raw).hexdigest()
+            if self._unchanged(name, metadata, content_hash):
+                return False
+            df, issues = pd.read_csv(io.BytesIO(raw)), []
+
+        now = time.time()
+        _atomic_write(data_path, lambda f: df.to_parquet(f, index=False))
+        self._write_metadata(name, {
+            "format": FORMAT,
+            "gid": gid,
+            "hash": content_hash,
+            "issues": issues,
+            "source": repr(self.source),
+            "fetched_at": now,
+            "checked_at": now,
+        })
+        return True
+
+
+# Répertoire local des onglets (EFE_DATA_DIR), ou None pour la source Google Sheets
+def local_data_dir():
+    return os.environ.get("EFE_DATA_DIR") or None
+
+
+# Choisir la source : un répertoire local si EFE_DATA_DIR est défini, sinon Google Sheets
+# (ou un serveur qui imite son export CSV, à l'adresse EFE_EXPORT_URL). file_id n'est
+# utilisé que pour Google Sheets.
+def default_source(file_id):
+    data_dir = local_data_dir()
+    if data_dir:
+        return LocalDirectorySource(data_dir)
+    return GoogleSheetSource(file_id, url_template=os.environ.get("EFE_EXPORT_URL", GOOGLE_EXPORT_URL))
+
+
+# Lecture en flux (blocs de EFE_STREAM_CHUNKSIZE lignes) si la variable est définie
+def default_store(file_id):
+    chunksize = os.environ.get("EFE_STREAM_CHUNKSIZE")
+    return SnapshotStore(
+        default_source(file_id),
+        directory=os.environ.get("EFE_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR),
+        max_age=MAX_AGE,
+        chunksize=int(chunksize) if chunksize else None,
+    )
@@ -0,0 +1,109 @@
+# Import en flux des onglets à une ligne par candidat
+#
+# L'export CSV est lu par blocs de lignes (sans jamais être chargé en entier) :
+# chaque bloc est validé selon le schéma de l'onglet puis replié dans des agrégats
+# courants par session × établissement (× spécialité) et par colonne de notes
+# (nombre et somme des notes). Seuls ces agrégats restent en mémoire ; la mémoire
+# de pointe dépend de la taille des blocs et du nombre de groupes, et non de la
+# taille de l'onglet. L'onglet servi aux pages contient une
+# ligne par groupe, avec la moyenne de chaque note ainsi que sa somme et son nombre
+# de notes : les moyennes aux niveaux supérieurs (établissement, session) sont
+# pondérées par ces nombres, et non calculées comme moyennes des moyennes.
+import hashlib
+import io
+
+import numpy as np
+import pandas as pd
+
+from efe.schema import SCHEMAS, apply_schema, weight_columns
+
+DEFAULT_CHUNKSIZE = 50_000
+
+# Statistiques courantes et façon de combiner deux valeurs partielles
+STATISTICS = {"nombre": "sum", "somme": "sum"}
+
+
+# Flux binaire dont l'empreinte SHA-256 est calculée au fil de la lecture
+class HashingReader(io.RawIOBase):
+    def __init__(self, stream):
+        self._stream = stream
+        self._hash = hashlib.sha256()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._stream.read(len(buffer))
+        self._hash.update(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+class RunningAggregates:
+    def __init__(self, keys, scores):
+        self.keys = list(keys)
+        self.scores = list(scores)
+        self.table = None  # Colonnes (statistique, note), lignes indexées par groupe
+
+    # Statistiques d'un bloc, par groupe (notes repassées en double précision et
+    # arrondies à 4 décimales, comme dans la table d'agrégats)
+    def _summarize(self, df):
+        notes = df[self.scores].astype("float64").round(4)
+        keys = [df[key] for key in self.keys]
+        grouped = notes.groupby(keys, observed=True)
+        return pd.concat({
+            "nombre": grouped.count(),
+            "somme": grouped.sum(),
+        }, axis=1)
+
+    # Replier un bloc de lignes (typé par le schéma) dans les agrégats
+    def update(self, df):
+        self.merge_table(self._summarize(df))
+
+    # Combiner des statistiques partielles (mêmes groupes et notes) avec les agrégats
+    def merge_table(self, table):
+        if self.table is None:
+            self.table = table
+            return
+        combined = pd.concat([self.table, table])
+        by = list(range(len(self.keys)))
+        self.table = pd.concat({
+            statistic: getattr(combined[statistic].groupby(level=by, observed=True), how)()
+            for statistic, how in STATISTICS.items()
+        }, axis=1)
+
+    # Moyenne de chaque note par groupe : une ligne par groupe, colonnes de l'onglet
+    # suivies de la somme et du nombre de chaque note (voir weight_columns)
+    def means(self):
+        weights = [column for score in self.scores for column in weight_columns(score)]
+        if self.table is None:
+            return pd.DataFrame(columns=self.keys + self.scores + weights)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            means = self.table["somme"] / self.table["nombre"].where(self.table["nombre"] > 0)
+        for score in self.scores:
+            somme, nombre = weight_columns(score)
+            means[somme] = self.table["somme", score]
+            means[nombre] = self.table["nombre", score].astype("int64")
+        return means.rename_axis(self.keys).reset_index()
+
+
+# Lire un onglet en flux depuis un fichier binaire CSV. Renvoie l'onglet réduit à
+# une ligne par groupe (moyennes, sommes et nombres de notes), l'empreinte du
+# contenu et les anomalies relevées.
+def stream_sheet(name, stream, chunksize=DEFAULT_CHUNKSIZE):
+    schema = SCHEMAS[name]
+    running = RunningAggregates(("session",) + schema.categories, schema.scores)
+    reader = HashingReader(stream)
+    issues = {}
+    with pd.read_csv(io.BufferedReader(reader), chunksize=chunksize) as chunks:
+        for chunk in chunks:
+            typed, chunk_issues = apply_schema(name, chunk)
+            for issue in chunk_issues:
+                count, message = issue.split(" ", 1)
+                issues[message] = issues.get(message, 0) + int(count)
+            running.update(typed)
+    issues = [f"{count} {message}" for message, count in issues.items()]
+    return running.means(), reader.hexdigest(), issues
@@ -0,0 +1,88 @@
+# Évolution des moyennes d'une session à l'autre
+#
+# Les moyennes de la table d'agrégats sont pivotées par session, en une passe par
+# niveau (tous établissements, par établissement, par spécialité, par
+# établissement et spécialité), quel que soit le nombre de sessions. Chaque ligne
+# donne la série des moyennes d'une épreuve et la variation (en %) par rapport à
+# la session précédente.
+import numpy as np
+import pandas as pd
+
+from efe.dataset import versioned
+
+# Couleurs des sessions dans les graphiques, de la plus récente à la plus ancienne
+SESSION_COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b", "#e377c2", "#7f7f7f"]
+
+LEVELS = [("établissement", "spécialité"), ("établissement",), ("spécialité",), ()]
+
+
+# Variation (en %) de chaque session par rapport à la précédente : NaN sans moyenne
+# précédente, 0 si la moyenne précédente est nulle
+def _variations(means):
+    previous = means.shift(1, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variations = (means - previous) / previous * 100
+    return variations.mask(previous == 0, 0.0)
+
+
+@versioned
+class Trends:
+    def __init__(self, aggregates):
+        self.version = aggregates.version
+        self._means = {}
+        self._variations = {}
+        for by in LEVELS:
+            means = aggregates.level(*by)["moyenne"].unstack("session").sort_index(axis=1)
+            self._means[by] = means
+            self._variations[by] = _variations(means)
+
+        # Sessions où chaque épreuve a au moins une moyenne
+        overall = self._means[()]
+        self._sessions = {
+            épreuve: [session for session, mean in row.items() if pd.notna(mean)]
+            for épreuve, row in overall.iterrows()
+        }
+
+    # Sessions disponibles (dans l'ordre), pour au moins une des épreuves données
+    # (toutes par défaut)
+    def sessions(self, épreuves=None):
+        épreuves = self._sessions if épreuves is None else épreuves
+        return sorted({session for épreuve in épreuves for session in self._sessions.get(épreuve, [])})
+
+    def _key(self, épreuve, établissement, spécialité):
+        by = tuple(name for name, value in [("établissement", établissement), ("spécialité", spécialité)]
+                   if value is not None)
+        key = (épreuve,) + tuple(value for value in (établissement, spécialité) if value is not None)
+        return by, key if by else épreuve
+
+    # Série des moyennes d'une épreuve par session, éventuellement restreinte à un
+    # établissement et/ou une spécialité
+    def series(self, épreuve, établissement=None, spécialité=None):
+        by, key = self._key(épreuve, établissement, spécialité)
+        try:
+            return self._means[by].loc[key]
+        except KeyError:
+            return pd.Series(dtype="float64")
+
+    # Moyenne d'une session et variation (en %) par rapport à la session précédente
+    def delta(self, épreuve, session, établissement=None, spécialité=None):
+        by, key = self._key(épreuve, établissement, spécialité)
+        try:
+            return self._means[by].at[key, session], self._variations[by].at[key, session]
+        except KeyError:
+            return np.nan, np.nan
+
+    # Moyennes de plusieurs épreuves (lignes, dans l'ordre donné) par session (colonnes)
+    def means(self, épreuves, sessions=None):
+        means = self._means[()].reindex(épreuves)
+        return means if sessions is None else means.reindex(columns=sessions)
+
+
+# Couleur de chaque session (clé : session en texte), la plus récente en bleu
+def session_colors(sessions):
+    ordered = sorted(sessions, reverse=True)
+    return {str(session): SESSION_COLORS[index % len(SESSION_COLORS)] for index, session in enumerate(ordered)}
+
+
+def build_trends(aggregates):
+    return Trends(aggregates)
@@ -0,0 +1,104 @@
+# Préchauffage des caches au démarrage du serveur
+#
+#     python -m efe.warmup [options de streamlit run]   (préchauffer puis servir ACCUEIL.py)
+#     python -m efe.warmup --no-serve                   (préchauffer et afficher les durées)
+#
+# Avant d'ouvrir le serveur, on importe la pile graphique (plotly.express), puis
+# chaque page (BAC, DNB, EAF) est exécutée sans navigateur (Streamlit AppTest) une
+# fois pour chaque établissement de son sélecteur. Les onglets sont ainsi chargés et
+# toutes les fonctions mémoïsées (cache_data / cache_resource) calculées dans le
+# processus même du serveur : le premier visiteur trouve des caches chauds.
+#
+# Les caches Streamlit sont propres au processus : le préchauffage doit donc
+# s'exécuter dans le processus du serveur, avant sa création (AppTest remplace le
+# Runtime de Streamlit le temps de chaque exécution).
+import argparse
+import importlib
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+MAIN_SCRIPT = "ACCUEIL.py"
+PAGES = ["pages/BAC.py", "pages/DNB.py", "pages/EAF.py"]
+CHART_MODULES = ["plotly.express", "plotly.graph_objects"]
+
+
+class WarmupError(RuntimeError):
+    pass
+
+
+# Importer la pile graphique (coût payé une fois par processus)
+def import_chart_stack():
+    for module in CHART_MODULES:
+        importlib.import_module(module)
+
+
+# Exécuter une page pour chaque établissement de son sélecteur. Renvoie le nombre
+# d'exécutions.
+def warm_page(page, timeout=300):
+    from streamlit.testing.v1 import AppTest
+
+    from efe.selection import KEY
+
+    at = AppTest.from_file(str(ROOT / page), default_timeout=timeout)
+    at.run()
+    if at.exception:
+        raise WarmupError(f"{page} : {at.exception[0].message}")
+    runs = 1
+    if at.selectbox:
+        for etablissement in at.selectbox(key=KEY).options[1:]:
+            at.session_state[KEY] = etablissement
+            at.run()
+            if at.exception:
+                raise WarmupError(f"{page} ({etablissement}) : {at.exception[0].message}")
+            runs += 1
+    return runs
+
+
+# Préchauffer la pile graphique puis les pages ; renvoie les durées (en secondes) de
+# chaque étape
+def warm_up(pages=PAGES, timeout=300, log=print):
+    durations = {}
+    start = time.perf_counter()
+    import_chart_stack()
+    durations["pile graphique"] = time.perf_counter() - start
+    log(f"Pile graphique importée en {durations['pile graphique']:.1f} s")
+
+    for page in pages:
+        step = time.perf_counter()
+        runs = warm_page(page, timeout)
+        durations[page] = time.perf_counter() - step
+        log(f"{page} : {runs} exécutions en {durations[page]:.1f} s")
+
+    durations["total"] = time.perf_counter() - start
+    log(f"Préchauffage terminé en {durations['total']:.1f} s")
+    return durations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m efe.warmup",
+        description="Préchauffer les caches puis démarrer le serveur Streamlit",
+    )
+    parser.add_argument("--no-serve", action="store_true", help="préchauffer sans démarrer le serveur")
+    parser.add_argument("--timeout", type=float, default=300, help="délai maximal (s) d'une exécution de page")
+    args, streamlit_args = parser.parse_known_args(argv)
+
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+    warm_up(timeout=args.timeout)
+    if args.no_serve:
+        return
+
+    # AppTest a exécuté chaque page comme script principal : Streamlit doit
+    # redétecter le répertoire pages/ à partir de ACCUEIL.py
+    from streamlit.runtime.pages_manager import PagesManager
+    from streamlit.web import cli
+    PagesManager.uses_pages_directory = None
+    cli.main(["run", MAIN_SCRIPT, *streamlit_args], prog_name="streamlit")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,107 +1,81 @@
 
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 
+from efe.data import display_refresh_status, load_correlations, load_engine, load_etablissements, load_rankings, load_trends
+from efe.dataset import cache_resource
+from efe.figures import figure_template, patch_figure, plotly_chart
+from efe.profiling import display_profiling_panel, profiled, start_trace
+from efe.rankings import TOTAL_DNB
+from efe.selection import ranking_rows, select_etablissement, selected_etablissement
+from efe.trends import session_colors
+
 st.set_page_config(layout="wide")
+start_trace("DNB")
 
 
-# Fonction pour charger un onglet spécifique depuis Google Sheets
-@st.cache_data
-def load_sheet(file_id, gid):
-    url = f"https://docs.google.com/spreadsheets/d/{file_id}/export?format=csv&gid={gid}"
-    df = pd.read_csv(url)
-    return df
+# Charger les onglets (moteur de requêtes) et les résultats précalculés
+engine = load_engine()
+etablissements = load_etablissements()
+rankings = load_rankings()
+correlations = load_correlations()
+trends = load_trends()
 
-# Charger chaque onglet dans un DataFrame
-file_id = st.secrets["google_sheets"]["file_id"]
-sheets = {
-    "philosophie": "776936543",
-    "eds": "455744397",
-    "go": "1814626375",
-    "dnb":"1644783757",
-    "eaf":"1206285985"
-}
+# Liste des épreuves
+subjects = [
+    "Français (sur 100)", "Hist. Géo.EMC (sur 50)", "Mathématiques (sur 100)",
+    "Sciences (sur 50)", "SO de projet (sur 100)", "Socle Commun (sur 400)",
+    "DNL Hist. Géo. arabe (sur 50)", "Langue de la section (sur 50)"
+]
 
-dnb_df = load_sheet(file_id, sheets["dnb"])
-dnb_df.columns = dnb_df.columns.str.strip()
+# Sessions disponibles pour le DNB ; la plus récente est détaillée
+sessions = trends.sessions(subjects)
+session = sessions[-1]
 
 
 # Sélectionner un établissement pour le mettre en surbrillance dans la barre latérale
+# (seules les sections qui en dépendent sont relancées)
 with st.sidebar:
-    highlighted_etablissement = st.selectbox(
-        "Choisissez un établissement à mettre en surbrillance :",
-        sorted(dnb_df['établissement'].unique())
+    select_etablissement(
+        etablissements.options("dnb"),
+        sections=["etablissement", "correlations"]
     )
+    display_refresh_status()
 
 # Définir une palette de couleurs pour chaque année
-colors = {
-    "2023": "#ff7f0e",  # Orange pour 2023
-    "2024": "#1f77b4",  # Bleu pour 2024
-}
-
-# Fonction pour filtrer les données par année
-@st.cache_data
-def filter_data_by_year(df, year):
-    return df[df['session'] == year]
-
-dnb_df_year_2024 = filter_data_by_year(dnb_df, 2024)
-dnb_df_year_2023 = filter_data_by_year(dnb_df, 2023)
-
-
-# Fonction pour créer un résumé des moyennes pour les épreuves séparées
-@st.cache_data
-def create_summary(dnb_df_year_2023, dnb_df_year_2024):
-    summary_data_100 = pd.DataFrame({
-        'Épreuve': [
-            'Français', 'Mathématiques', 'SO de projet'
-        ],
-        '2023': [
-            dnb_df_year_2023['Français (sur 100)'].mean(),
-            dnb_df_year_2023['Mathématiques (sur 100)'].mean(),
-            dnb_df_year_2023['SO de projet (sur 100)'].mean()
-        ],
-        '2024': [
-            dnb_df_year_2024['Français (sur 100)'].mean(),
-            dnb_df_year_2024['Mathématiques (sur 100)'].mean(),
-            dnb_df_year_2024['SO de projet (sur 100)'].mean()
-        ]
-    })
-
-    summary_data_50 = pd.DataFrame({
-        'Épreuve': [
-            'Hist. Géo.EMC', 'Sciences',
-            'DNL Hist. Géo. arabe', 'Langue de la section'
-        ],
-        '2023': [
-            dnb_df_year_2023['Hist. Géo.EMC (sur 50)'].mean(),
-            dnb_df_year_2023['Sciences (sur 50)'].mean(),
-            dnb_df_year_2023['DNL Hist. Géo. arabe (sur 50)'].mean(),
-            dnb_df_year_2023['Langue de la section (sur 50)'].mean()
-        ],
-        '2024': [
-            dnb_df_year_2024['Hist. Géo.EMC (sur 50)'].mean(),
-            dnb_df_year_2024['Sciences (sur 50)'].mean(),
-            dnb_df_year_2024['DNL Hist. Géo. arabe (sur 50)'].mean(),
-            dnb_df_year_2024['Langue de la section (sur 50)'].mean()
-        ]
-    })
-
-    summary_data_socle = pd.DataFrame({
-        'Épreuve': ['Socle Commun'],
-        '2023': [dnb_df_year_2023['Socle Commun (sur 400)'].mean()],
-        '2024': [dnb_df_year_2024['Socle Commun (sur 400)'].mean()]
-    })
-
-    return summary_data_100, summary_data_50, summary_data_socle
+colors = session_colors(sessions)
 
-# Créer les résumés de données pour les trois graphiques
-summary_df_100, summary_df_50, summary_df_socle = create_summary(dnb_df_year_2023, dnb_df_year_2024)
+# Fonction pour filtrer les données par année (requête sur le moteur SQL ; une seule copie
+# partagée par toutes les sessions, à ne pas modifier)
+@cache_resource
+def filter_data_by_year(engine, year):
+    return engine.rows("dnb", session=year)
 
-# Fonction pour afficher un graphique en barres
-def display_bar_chart(summary_df, title):
+dnb_session = filter_data_by_year(engine, session)
+
+
+# Fonction pour créer un résumé des moyennes d'épreuves (une colonne par session)
+def create_summary(trends, sessions, epreuves, labels):
+    summary_df = trends.means(epreuves, sessions).rename(index=dict(zip(epreuves, labels)), columns=str)
+    return summary_df.rename_axis(index='Épreuve', columns=None).reset_index()
+
+# Créer les résumés de données pour les trois graphiques
+summary_df_100 = create_summary(
+    trends, sessions,
+    ['Français (sur 100)', 'Mathématiques (sur 100)', 'SO de projet (sur 100)'],
+    ['Français', 'Mathématiques', 'SO de projet']
+)
+summary_df_50 = create_summary(
+    trends, sessions,
+    ['Hist. Géo.EMC (sur 50)', 'Sciences (sur 50)', 'DNL Hist. Géo. arabe (sur 50)', 'Langue de la section (sur 50)'],
+    ['Hist. Géo.EMC', 'Sciences', 'DNL Hist. Géo. arabe', 'Langue de la section']
+)
+summary_df_socle = create_summary(trends, sessions, ['Socle Commun (sur 400)'], ['Socle Commun'])
+
+# Fonction pour créer un graphique en barres (mémoïsé sur le contenu du résumé)
+@figure_template
+def bar_chart(summary_df, title):
     summary_df = summary_df.melt(id_vars="Épreuve", var_name="Année", value_name="Moyenne")
     fig = px.bar(
         summary_df,
@@ -124,35 +98,27 @@ def display_bar_chart(summary_df, title):
             x=0.5
         )
     )
-    st.plotly_chart(fig, use_container_width=True)
-
-# Fonction pour calculer la somme des épreuves du DNB pour chaque établissement et afficher le classement
-@st.cache_data
-def calculate_total_scores(dnb_df, highlighted_etablissement):
+    return fig
 
-    columns_to_sum = [
-    "Français (sur 100)", "Hist. Géo.EMC (sur 50)", "Mathématiques (sur 100)",
-    "Sciences (sur 50)", "SO de projet (sur 100)"]
-
-    # Calculer la somme des colonnes d'épreuves pour chaque établissement
-    dnb_df['total_score'] = dnb_df[columns_to_sum].sum(axis=1).round()
-
-    # Trier les établissements par score total de manière décroissante
-    total_score_summary = dnb_df[['établissement', 'total_score']].copy()
-    total_score_summary = total_score_summary.sort_values(by='total_score', ascending=False).reset_index(drop=True)
-
-    # Ajouter une colonne de rang pour chaque établissement
-    total_score_summary['rang'] = total_score_summary.index + 1
+# Fonction pour afficher un graphique en barres
+def display_bar_chart(summary_df, title):
+    plotly_chart(patch_figure(bar_chart(summary_df, title)), use_container_width=True)
 
-    # Ajouter une colonne pour mettre en évidence l'établissement sélectionné
-    total_score_summary['highlight'] = total_score_summary['établissement'] == highlighted_etablissement
+# Fonction pour calculer le classement des établissements basé sur la somme des épreuves du DNB
+# pour une session (indépendant de l'établissement sélectionné : calculé une seule fois par version des données et partagé)
+@cache_resource(persist=True)
+def calculate_total_scores(rankings, session):
+    return rankings.ranking(TOTAL_DNB, session).rename(columns={'moyenne': 'total_score'})
 
-    return total_score_summary
+# Fonction pour mettre en évidence l'établissement sélectionné dans un classement
+def highlight_etablissement(summary, highlighted_etablissement):
+    return summary.assign(highlight=summary['établissement'] == highlighted_etablissement)
 
-# Fonction pour afficher le classement des établissements basé sur la somme des épreuves du DNB
-def display_total_score_ranking(total_score_summary):
+# Fonction pour créer le graphique du classement basé sur la somme des épreuves du DNB, sans surbrillance
+@figure_template
+def total_score_chart(rankings, session):
     fig = px.bar(
-        total_score_summary,
+        calculate_total_scores(rankings, session),
         x="établissement",
         y="total_score",
         text="total_score",
@@ -160,37 +126,49 @@ def display_total_score_ranking(total_score_summary):
         title="Classement des établissements basé sur la somme des épreuves finales : Mathématiques, Francais, Sciences, Histoire-Géographie EMC, Oral",
     )
 
-    # Mettre en surbrillance l'établissement sélectionné
-    fig.update_traces(marker_color=color_based_on_highlight(total_score_summary), textposition='outside')
+    fig.update_traces(textposition='outside')
     fig.update_layout(
         yaxis=dict(range=[0, 500]),
         xaxis_title=None,
         yaxis_title=None,
         xaxis_tickangle=-45
     )
+    return fig
+
+# Fonction pour afficher le classement des établissements basé sur la somme des épreuves du DNB
+def display_total_score_ranking(rankings, session, total_score_summary):
+    # Mettre en surbrillance l'établissement sélectionné
+    fig = patch_figure(total_score_chart(rankings, session), marker_color=color_based_on_highlight(total_score_summary),
+                       rows=ranking_rows(total_score_summary))
 
     # Afficher le graphique
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
 
 
 st.title("Résultats DNB - EFE Maroc")
 st.divider()
 
 
-# Affichage des graphiques avec trois colonnes
+# Section « Résultats tout établissements » : indépendante de l'établissement sélectionné
+@st.fragment
+@profiled("section résultats globaux")
+def display_global_section(summary_df_100, summary_df_50, summary_df_socle):
+    # Affichage des graphiques avec trois colonnes
 
-st.subheader("Résultats tout établissements")
+    st.subheader("Résultats tout établissements")
 
-col1, col2, col3 = st.columns(3)
+    col1, col2, col3 = st.columns(3)
 
-with col1:
-    display_bar_chart(summary_df_100, "Épreuves finales sur 100")
+    with col1:
+        display_bar_chart(summary_df_100, "Épreuves finales sur 100")
 
-with col2:
-    display_bar_chart(summary_df_50, "Épreuves finales sur 50")
+    with col2:
+        display_bar_chart(summary_df_50, "Épreuves finales sur 50")
 
-with col3:
-    display_bar_chart(summary_df_socle, "Socle Commun")
+    with col3:
+        display_bar_chart(summary_df_socle, "Socle Commun")
+
+display_global_section(summary_df_100, summary_df_50, summary_df_socle)
 
 
 
@@ -199,156 +177,155 @@ with col3:
 def color_based_on_highlight(df):
     return ['#ff6347' if highlight else '#80c9e0' for highlight in df['highlight']]
 
-# Liste des épreuves
-subjects = [
-    "Français (sur 100)", "Hist. Géo.EMC (sur 50)", "Mathématiques (sur 100)",
-    "Sciences (sur 50)", "SO de projet (sur 100)", "Socle Commun (sur 400)",
-    "DNL Hist. Géo. arabe (sur 50)", "Langue de la section (sur 50)"
-]
-
-
-# Fonction pour calculer la moyenne et la variation
-@st.cache_data
-def calculate_metrics(df_2024, df_2023, highlighted_etablissement, subject):
-    mean_2024 = df_2024[df_2024['établissement'] == highlighted_etablissement][subject].mean()
-    mean_2023 = df_2023[df_2023['établissement'] == highlighted_etablissement][subject].mean()
-    variation = ((mean_2024 - mean_2023) / mean_2023 * 100) if mean_2023 != 0 else 0
-    return mean_2024, variation
+# Fonction pour créer le graphique de classement d'une épreuve pour une session, sans surbrillance
+@figure_template
+def ranking_chart(rankings, subject, session):
+    fig = px.bar(
+        rankings.ranking(subject, session),
+        x="moyenne",
+        y="établissement",
+        orientation="h",
+        text="rang",
+        labels={"moyenne": "Moyenne", "établissement": "Établissement"}
+    )
+    fig.update_traces(textposition='outside')
+    fig.update_layout(yaxis=dict(autorange="reversed"))  # Trier de haut en bas
+    fig.update_layout(xaxis_title=None, yaxis_title=None)
+    return fig
+
+# Fonction pour créer le nuage de points d'une paire d'épreuves, sans surbrillance
+@figure_template
+def scatter_chart(dataset, subj1, subj2):
+    fig = px.scatter(
+        dataset.df,
+        x=subj1,
+        y=subj2,
+        hover_name="établissement",  # Afficher le nom de l'établissement au survol
+        title=f"{subj1} vs {subj2}",
+    )
+    fig.update_layout(showlegend=False)
+    return fig
+
+# Fonction pour créer la carte de chaleur des corrélations entre les épreuves
+@figure_template
+def correlation_heatmap(correlations, subjects, session):
+    correlation_matrix = correlations.matrix(session, subjects)
+
+    # Créer la figure de la heatmap avec des annotations
+    fig = go.Figure(data=go.Heatmap(
+        z=correlation_matrix.values,
+        x=correlation_matrix.columns,
+        y=correlation_matrix.index,
+        colorscale="Viridis",
+        colorbar=dict(title="Corrélation"),
+        zmin=-1, zmax=1,  # Plage de valeurs pour la corrélation
+        text=correlation_matrix.round(2).values,  # Texte des valeurs arrondies à 2 décimales
+        texttemplate="%{text}",  # Affiche les valeurs dans chaque cellule
+    ))
+
+    # Mettre à jour la mise en page pour clarifier les étiquettes
+    fig.update_layout(
+        title="Matrice de corrélation entre les épreuves",
+        xaxis_title=None,
+        yaxis_title=None,
+        xaxis=dict(tickangle=-45)  # Incline les noms des épreuves pour plus de lisibilité
+    )
+    return fig
 
-st.subheader(f'Résultats pour : {highlighted_etablissement}')
+# Fonction pour calculer la moyenne d'une session et la variation par rapport à la précédente
+def calculate_metrics(trends, session, highlighted_etablissement, subject):
+    return trends.delta(subject, session, highlighted_etablissement)
 
+# Section des résultats de l'établissement sélectionné, relancée à chaque changement d'établissement
+@st.fragment(key="etablissement")
+@profiled("section établissement")
+def display_etablissement_section(rankings, trends, session):
+    highlighted_etablissement = selected_etablissement()
+    st.subheader(f'Résultats pour : {highlighted_etablissement}')
 
+    # Calculer et afficher le classement des scores totaux
+    total_score_summary = highlight_etablissement(calculate_total_scores(rankings, session), highlighted_etablissement)
 
-# Calculer et afficher le classement des scores totaux
-total_score_summary = calculate_total_scores(dnb_df_year_2024, highlighted_etablissement)
+    # st.dataframe(total_score_summary)
 
-# st.dataframe(total_score_summary)
+    display_total_score_ranking(rankings, session, total_score_summary)
 
-display_total_score_ranking(total_score_summary)
+    # Affichage des informations pour chaque épreuve dans une grille 4x2
+    rows = [subjects[:4], subjects[4:]]  # Diviser les épreuves en deux lignes de 4
 
-# Affichage des informations pour chaque épreuve dans une grille 4x2
-rows = [subjects[:4], subjects[4:]]  # Diviser les épreuves en deux lignes de 4
+    for row in rows:
+        cols = st.columns(4)
+        for idx, subject in enumerate(row):
+            with cols[idx]:
+                # Calculer les métriques pour l'épreuve
+                mean, variation = calculate_metrics(trends, session, highlighted_etablissement, subject)
 
-for row in rows:
-    cols = st.columns(4)
-    for idx, subject in enumerate(row):
-        with cols[idx]:
-            # Calculer les métriques pour l'épreuve
-            mean_2024, variation = calculate_metrics(dnb_df_year_2024, dnb_df_year_2023, highlighted_etablissement, subject)
+                # Préparer les données de classement pour l'épreuve avec surbrillance
+                subject_summary = highlight_etablissement(rankings.ranking(subject, session), highlighted_etablissement)
 
-            # Préparer les données de classement pour l'épreuve avec surbrillance
-            subject_summary = dnb_df_year_2024[['établissement', subject]].copy()
-            subject_summary = subject_summary.rename(columns={subject: 'moyenne'})  # Renommer pour uniformité
-            subject_summary = subject_summary.sort_values(by='moyenne', ascending=False).reset_index(drop=True)
-            subject_summary['rang'] = subject_summary.index + 1
-            subject_summary['highlight'] = subject_summary['établissement'] == highlighted_etablissement
+                # Afficher le titre, la métrique et la variation
+                with st.container(border=True):
+                    st.write(subject)
+                    st.metric(label=f"Moyenne {session}", value=f"{mean:.2f}", delta=f"{variation:.2f}%")
 
-            # Afficher le titre, la métrique et la variation
-            with st.container(border=True):
-                st.write(subject)
-                st.metric(label="Moyenne 2024", value=f"{mean_2024:.2f}", delta=f"{variation:.2f}%")
+                    # Graphique de classement pour l'épreuve, avec surbrillance
+                    fig = patch_figure(ranking_chart(rankings, subject, session), marker_color=color_based_on_highlight(subject_summary),
+                                       rows=ranking_rows(subject_summary))
 
-                # Créer le graphique de classement pour l'épreuve
-                fig = px.bar(
-                    subject_summary,
-                    x="moyenne",
-                    y="établissement",
-                    orientation="h",
-                    text="rang",
-                    labels={"moyenne": "Moyenne", "établissement": "Établissement"}
-                )
-                fig.update_traces(marker_color=color_based_on_highlight(subject_summary), textposition='outside')
-                fig.update_layout(yaxis=dict(autorange="reversed"))  # Trier de haut en bas
-                fig.update_layout(xaxis_title=None, yaxis_title=None)
+                    plotly_chart(fig, use_container_width=True)
 
-                st.plotly_chart(fig, use_container_width=True)
+display_etablissement_section(rankings, trends, session)
 
 
+# Section des épreuves les plus corrélées, relancée à chaque changement d'établissement
+# (surbrillance des nuages de points)
+@st.fragment(key="correlations")
+@profiled("section corrélations")
+def display_correlation_section(dnb_session, correlations, session):
+    highlighted_etablissement = selected_etablissement()
 
+    # Les deux paires d'épreuves les plus corrélées (en valeur absolue)
+    top_two_pairs = correlations.top_pairs(session, subjects, k=2).itertuples(index=False)
 
+    st.subheader("Épreuves les plus corrélées")
+    col1, col2 = st.columns(2)
 
-# Calcul de la matrice de corrélation
-correlation_matrix = dnb_df_year_2024[subjects].corr()
+    for idx, (subj1, subj2, corr_value) in enumerate(top_two_pairs):
+        # Créer une nouvelle colonne pour la surbrillance de l'établissement
+        scatter_df = highlight_etablissement(dnb_session.df, highlighted_etablissement)
 
-# Trouver les deux paires d'épreuves les plus corrélées
-correlated_pairs = []
-for i in range(len(subjects)):
-    for j in range(i + 1, len(subjects)):
-        corr_value = correlation_matrix.iloc[i, j]
-        correlated_pairs.append((subjects[i], subjects[j], corr_value))
+        # Scatter plot pour la paire d'épreuves, avec surbrillance
+        fig = patch_figure(
+            scatter_chart(dnb_session, subj1, subj2),
+            marker_color=color_based_on_highlight(scatter_df),
+            marker_size=10 if scatter_df['highlight'].any() else 6
+        )
 
-# Trier les paires par valeur absolue de corrélation et prendre les deux plus élevées
-top_two_pairs = sorted(correlated_pairs, key=lambda x: abs(x[2]), reverse=True)[:2]
+        # Afficher le graphique dans la colonne appropriée
+        if idx == 0:
+            with col1:
+                plotly_chart(fig, use_container_width=True)
+        else:
+            with col2:
+                plotly_chart(fig, use_container_width=True)
 
 
-st.subheader("Épreuves les plus corrélées")
-col1, col2 = st.columns(2)
+    col1, col2 = st.columns(2)
 
-for idx, (subj1, subj2, corr_value) in enumerate(top_two_pairs):
-    # Créer une nouvelle colonne pour la surbrillance de l'établissement
-    dnb_df_year_2024['highlight'] = dnb_df_year_2024['établissement'] == highlighted_etablissement
+    with col1:
+        with st.popover("Comprendre la visualisation"):
+            st.write("Dans les graphiques ci-dessus, le point rouge représente l'établissement que vous avez sélectionné, tandis que les points bleus représentent les autres établissements. Ce positionnement permet de situer les performances de l'établissement choisi par rapport aux autres dans chaque paire d'épreuves corrélées. Si le point rouge se trouve vers le haut ou la droite du graphique, cela indique que cet établissement a des performances supérieures dans l'épreuve correspondante. Inversement, un point rouge en bas ou à gauche signifie que les scores de l'établissement sont inférieurs à ceux de la plupart des autres établissements.")
 
-    # Créer le scatter plot pour la paire d'épreuves
-    fig = px.scatter(
-        dnb_df_year_2024,
-        x=subj1,
-        y=subj2,
-        hover_name="établissement",  # Afficher le nom de l'établissement au survol
-        labels={"highlight": "Établissement sélectionné"},
-        title=f"{subj1} vs {subj2}",
-    )
+    with col2:
+        # Contenu calculé seulement lorsque la fenêtre est ouverte
+        with st.popover('Voir les autres corrélations', on_change="rerun") as popover:
+            if popover.open:
+                # Affichage de la matrice de corrélation sous forme de carte de chaleur
+                st.subheader(f"Corrélations entre les épreuves du DNB - {session}")
+                plotly_chart(patch_figure(correlation_heatmap(correlations, subjects, session)), use_container_width=True)
 
-    # Mettre à jour la légende et l'affichage
-    fig.update_layout(showlegend=False)
-    fig.update_traces(marker=dict(color=color_based_on_highlight(dnb_df_year_2024)))
-    fig.update_traces(marker=dict(size=10 if dnb_df_year_2024['highlight'].any() else 6))
-
-    # Afficher le graphique dans la colonne appropriée
-    if idx == 0:
-        col1.plotly_chart(fig, use_container_width=True)
-    else:
-        col2.plotly_chart(fig, use_container_width=True)
-
-
-col1, col2 = st.columns(2)
-
-with col1:
-    with st.popover("Comprendre la visualisation"):
-        st.write("Dans les graphiques ci-dessus, le point rouge représente l'établissement que vous avez sélectionné, tandis que les points bleus représentent les autres établissements. Ce positionnement permet de situer les performances de l'établissement choisi par rapport aux autres dans chaque paire d'épreuves corrélées. Si le point rouge se trouve vers le haut ou la droite du graphique, cela indique que cet établissement a des performances supérieures dans l'épreuve correspondante. Inversement, un point rouge en bas ou à gauche signifie que les scores de l'établissement sont inférieurs à ceux de la plupart des autres établissements.")
-
-with col2:
-    with st.popover('Voir les autres corrélations'):
-        correlation_matrix = dnb_df_year_2024[subjects].corr()
-        subjects = [
-        "Français (sur 100)", "Hist. Géo.EMC (sur 50)", "Mathématiques (sur 100)",
-        "Sciences (sur 50)", "SO de projet (sur 100)", "Socle Commun (sur 400)",
-        "DNL Hist. Géo. arabe (sur 50)", "Langue de la section (sur 50)"
-    ]
-
-        # Calcul de la matrice de corrélation
-        correlation_matrix = dnb_df_year_2024[subjects].corr()
-
-        # Affichage de la matrice de corrélation sous forme de carte de chaleur
-        st.subheader("Corrélations entre les épreuves du DNB - 2024")
-
-        # Créer la figure de la heatmap avec des annotations
-        fig = go.Figure(data=go.Heatmap(
-            z=correlation_matrix.values,
-            x=correlation_matrix.columns,
-            y=correlation_matrix.index,
-            colorscale="Viridis",
-            colorbar=dict(title="Corrélation"),
-            zmin=-1, zmax=1,  # Plage de valeurs pour la corrélation
-            text=correlation_matrix.round(2).values,  # Texte des valeurs arrondies à 2 décimales
-            texttemplate="%{text}",  # Affiche les valeurs dans chaque cellule
-        ))
-
-        # Mettre à jour la mise en page pour clarifier les étiquettes
-        fig.update_layout(
-            title="Matrice de corrélation entre les épreuves",
-            xaxis_title=None,
-            yaxis_title=None,
-            xaxis=dict(tickangle=-45)  # Incline les noms des épreuves pour plus de lisibilité
-        )
+display_correlation_section(dnb_session, correlations, session)
 
-        st.plotly_chart(fig, use_container_width=True)
+# Panneau de profilage (?debug=1 dans l'adresse de la page)
+with st.sidebar:
+    display_profiling_panel()
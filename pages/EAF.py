@@ -1,76 +1,62 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import matplotlib.pyplot as plt
+
+from efe.data import display_refresh_status, load_engine, load_etablissements, load_rankings, load_trends
+from efe.dataset import cache_resource
+from efe.figures import figure_template, patch_figure, plotly_chart
+from efe.profiling import display_profiling_panel, profiled, start_trace
+from efe.rankings import AVERAGE_EAF
+from efe.selection import ranking_rows, select_etablissement, selected_etablissement
+from efe.trends import session_colors
 
 st.set_page_config(layout="wide")
+start_trace("EAF")
+
+# Charger les onglets (moteur de requêtes) et les résultats précalculés
+engine = load_engine()
+etablissements = load_etablissements()
+rankings = load_rankings()
+trends = load_trends()
+
+# Sessions disponibles pour les EAF ; la plus récente est détaillée
+sessions = trends.sessions(['écrit', 'oral'])
+session = sessions[-1]
 
-# Fonction pour charger un onglet spécifique depuis Google Sheets
-@st.cache_data
-def load_sheet(file_id, gid):
-    url = f"https://docs.google.com/spreadsheets/d/{file_id}/export?format=csv&gid={gid}"
-    df = pd.read_csv(url)
-    return df
-
-# Charger chaque onglet dans un DataFrame
-file_id = st.secrets["google_sheets"]["file_id"]
-sheets = {
-    "philosophie": "776936543",
-    "eds": "455744397",
-    "go": "1814626375",
-    "dnb":"1644783757",
-    "eaf":"1206285985"
-}
-
-# Charger l'onglet EAF dans un DataFrame
-eaf_df = load_sheet(file_id, sheets["eaf"])
-eaf_df.columns = eaf_df.columns.str.strip()  # Supprimer les espaces dans les noms de colonnes
-
-# Fonction pour filtrer les données par année
-@st.cache_data
-def filter_data_by_year(df, year):
-    return df[df['session'] == year]
+# Fonction pour filtrer les données par année (requête sur le moteur SQL ; une seule copie
+# partagée par toutes les sessions, à ne pas modifier)
+@cache_resource
+def filter_data_by_year(engine, year):
+    return engine.rows("eaf", session=year)
 
 # Sélectionner un établissement pour le mettre en surbrillance dans la barre latérale
+# (seules les sections qui en dépendent sont relancées)
 with st.sidebar:
-    highlighted_etablissement_eaf = st.selectbox(
-        "Choisissez un établissement pour les épreuves anticipées de français :",
-        sorted(eaf_df['établissement'].unique())
+    select_etablissement(
+        etablissements.options("eaf"),
+        sections=["classement", "etablissement"],
+        label="Choisissez un établissement pour les épreuves anticipées de français :"
     )
+    display_refresh_status()
 
 # Filtrer les données par année pour EAF
-eaf_df_year_2024 = filter_data_by_year(eaf_df, 2024)
-eaf_df_year_2023 = filter_data_by_year(eaf_df, 2023)
-
-# Calcul des moyennes pour les épreuves EAF
-@st.cache_data
-def create_summary_eaf(eaf_df_year_2023, eaf_df_year_2024):
-    summary_data_eaf = pd.DataFrame({
-        'Épreuve': ['Écrit', 'Oral'],
-        '2023': [
-            eaf_df_year_2023['écrit'].mean(),
-            eaf_df_year_2023['oral'].mean()
-        ],
-        '2024': [
-            eaf_df_year_2024['écrit'].mean(),
-            eaf_df_year_2024['oral'].mean()
-        ]
-    })
-    return summary_data_eaf
+eaf_session = filter_data_by_year(engine, session)
+
+# Calcul des moyennes pour les épreuves EAF (une colonne par session)
+def create_summary_eaf(trends, sessions):
+    summary_data_eaf = trends.means(['écrit', 'oral'], sessions).rename(index={'écrit': 'Écrit', 'oral': 'Oral'}, columns=str)
+    return summary_data_eaf.rename_axis(index='Épreuve', columns=None).reset_index()
 
 # Fonction pour créer des couleurs conditionnelles pour la surbrillance
 def color_based_on_highlight(df):
     return ['#ff6347' if highlight else '#80c9e0' for highlight in df['highlight']]
 
 # Définir une palette de couleurs pour chaque année
-colors = {
-    "2023": "#ff7f0e",  # Orange pour 2023
-    "2024": "#1f77b4",  # Bleu pour 2024
-}
+colors = session_colors(sessions)
 
 
-# Fonction pour afficher un graphique en barres
-def display_bar_chart(summary_df, title):
+# Fonction pour créer un graphique en barres (mémoïsé sur le contenu du résumé)
+@figure_template
+def bar_chart(summary_df, title):
     summary_df = summary_df.melt(id_vars="Épreuve", var_name="Année", value_name="Moyenne")
     fig = px.bar(
         summary_df,
@@ -93,33 +79,31 @@ def display_bar_chart(summary_df, title):
             x=0.5
         )
     )
-    st.plotly_chart(fig, use_container_width=True)
-
-# Créer le résumé pour les épreuves anticipées de français
-summary_df_eaf = create_summary_eaf(eaf_df_year_2023, eaf_df_year_2024)
-
-# Calcul des moyennes pour les épreuves EAF (écrit et oral) pour chaque établissement et affichage du classement
-@st.cache_data
-def calculate_average_eaf(eaf_df, highlighted_etablissement):
-    # Calculer la moyenne des scores Écrit et Oral pour chaque établissement
-    eaf_df['average_score'] = eaf_df[['écrit', 'oral']].mean(axis=1).round(2)  # Arrondi à deux décimales
-
-    # Trier les établissements par score moyen de manière décroissante
-    average_score_summary = eaf_df[['établissement', 'average_score']].copy()
-    average_score_summary = average_score_summary.sort_values(by='average_score', ascending=False).reset_index(drop=True)
-
-    # Ajouter une colonne de rang pour chaque établissement
-    average_score_summary['rang'] = average_score_summary.index + 1
-
-    # Ajouter une colonne pour mettre en évidence l'établissement sélectionné
-    average_score_summary['highlight'] = average_score_summary['établissement'] == highlighted_etablissement
+    return fig
 
-    return average_score_summary
+# Fonction pour afficher un graphique en barres
+def display_bar_chart(summary_df, title):
+    plotly_chart(patch_figure(bar_chart(summary_df, title)), use_container_width=True)
 
-# Fonction pour afficher le classement des établissements basé sur la moyenne Écrit + Oral (barchart vertical)
-def display_average_score_ranking_vertical(average_score_summary):
+# Créer le résumé pour les épreuves anticipées de français
+summary_df_eaf = create_summary_eaf(trends, sessions)
+
+# Calcul du classement des établissements sur la moyenne des épreuves EAF (écrit et oral) pour une
+# session (indépendant de l'établissement sélectionné : calculé une seule fois par version des données et partagé)
+@cache_resource(persist=True)
+def calculate_average_eaf(rankings, session):
+    return rankings.ranking(AVERAGE_EAF, session).rename(columns={'moyenne': 'average_score'})
+
+# Fonction pour mettre en évidence l'établissement sélectionné dans un classement
+def highlight_etablissement(summary, highlighted_etablissement):
+    return summary.assign(highlight=summary['établissement'] == highlighted_etablissement)
+
+# Fonction pour créer le classement des établissements basé sur la moyenne Écrit + Oral (barchart vertical),
+# sans surbrillance
+@figure_template
+def average_score_chart(rankings, session):
     fig = px.bar(
-        average_score_summary,
+        calculate_average_eaf(rankings, session),
         x="établissement",
         y="average_score",
         text="average_score",
@@ -127,121 +111,139 @@ def display_average_score_ranking_vertical(average_score_summary):
         title="Classement des établissements basé sur la moyenne des épreuves Écrit + Oral",
     )
 
-    # Mettre en surbrillance l'établissement sélectionné
-    fig.update_traces(marker_color=color_based_on_highlight(average_score_summary), textposition='outside')
+    fig.update_traces(textposition='outside')
     fig.update_layout(
         yaxis=dict(range=[0, 16]),
         xaxis_title=None,
         yaxis_title=None,
         xaxis_tickangle=-45,  # Incline les étiquettes pour améliorer la lisibilité
     )
+    return fig
+
+# Fonction pour afficher le classement des établissements basé sur la moyenne Écrit + Oral (barchart vertical)
+def display_average_score_ranking_vertical(rankings, session, average_score_summary):
+    # Mettre en surbrillance l'établissement sélectionné
+    fig = patch_figure(average_score_chart(rankings, session), marker_color=color_based_on_highlight(average_score_summary),
+                       rows=ranking_rows(average_score_summary))
 
     # Afficher le graphique
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
 
 # Affichage des résultats EAF en bar chart
 st.subheader("Résultats des épreuves anticipées de français")
 
+# Section « Résultats tout établissements » : indépendante de l'établissement sélectionné
+@st.fragment
+@profiled("section résultats globaux")
+def display_global_section(summary_df_eaf):
+    display_bar_chart(summary_df_eaf, "Épreuves anticipées sur 20")
+
+# Section du classement sur la moyenne Écrit + Oral, relancée à chaque changement d'établissement
+@st.fragment(key="classement")
+@profiled("section classement")
+def display_overall_section(rankings, session):
+    # Calculer et afficher le classement des scores moyens avec un graphique vertical
+    average_score_summary = highlight_etablissement(calculate_average_eaf(rankings, session), selected_etablissement())
+    display_average_score_ranking_vertical(rankings, session, average_score_summary)
+
 col1, col2=st.columns([1,2])
 
 with col1:
-    display_bar_chart(summary_df_eaf, "Épreuves anticipées sur 20")
+    display_global_section(summary_df_eaf)
 
 with col2:
-    # Calculer et afficher le classement des scores moyens avec un graphique vertical
-    average_score_summary = calculate_average_eaf(eaf_df_year_2024, highlighted_etablissement_eaf)
-    display_average_score_ranking_vertical(average_score_summary)
+    display_overall_section(rankings, session)
 
 
 
-# Fonction pour calculer la moyenne et la variation pour EAF
-@st.cache_data
-def calculate_metrics_eaf(df_2024, df_2023, highlighted_etablissement, subject):
-    mean_2024 = df_2024[df_2024['établissement'] == highlighted_etablissement][subject].mean()
-    mean_2023 = df_2023[df_2023['établissement'] == highlighted_etablissement][subject].mean()
-    variation = ((mean_2024 - mean_2023) / mean_2023 * 100) if mean_2023 != 0 else 0
-    return mean_2024, variation
+# Fonction pour créer le graphique de classement d'une épreuve pour une session, sans surbrillance
+@figure_template
+def ranking_chart(rankings, subject, session):
+    fig = px.bar(
+        rankings.ranking(subject, session),
+        x="moyenne",
+        y="établissement",
+        orientation="h",
+        text="rang",
+        labels={"moyenne": "Moyenne", "établissement": "Établissement"}
+    )
+    fig.update_traces(textposition='outside')
+    fig.update_layout(yaxis=dict(autorange="reversed"))
+    fig.update_layout(xaxis_title=None, yaxis_title=None)
+    return fig
+
+# Fonction pour créer le nuage de points Écrit vs Oral, sans surbrillance
+@figure_template
+def scatter_chart(dataset):
+    fig = px.scatter(
+        dataset.df,
+        x="écrit",
+        y="oral",
+        hover_name="établissement"
+    )
+    fig.update_layout(showlegend=False)
+    return fig
 
+# Fonction pour calculer la moyenne d'une session et la variation par rapport à la précédente pour EAF
+def calculate_metrics_eaf(trends, session, highlighted_etablissement, subject):
+    return trends.delta(subject, session, highlighted_etablissement)
 
-# Affichage des résultats spécifiques pour l'établissement sélectionné
-st.subheader(f"Résultats pour l'établissement : {highlighted_etablissement_eaf}")
 
-# Création de la disposition à trois colonnes
-col1, col2, col3 = st.columns(3)
+# Section des résultats de l'établissement sélectionné, relancée à chaque changement d'établissement
+@st.fragment(key="etablissement")
+@profiled("section établissement")
+def display_etablissement_section(rankings, trends, session, eaf_session):
+    highlighted_etablissement_eaf = selected_etablissement()
 
-# Colonne 1 : Épreuve "Écrit" - Affichage des métriques et du classement
-with col1:
-    mean_2024_ecrit, variation_ecrit = calculate_metrics_eaf(eaf_df_year_2024, eaf_df_year_2023, highlighted_etablissement_eaf, "écrit")
-    with st.container(border=True):
-        st.write("**Écrit**")
-        st.metric(label="Moyenne 2024", value=f"{mean_2024_ecrit:.2f}", delta=f"{variation_ecrit:.2f}%")
-
-        # Préparer les données de classement pour "Écrit"
-        ecrit_summary = eaf_df_year_2024[['établissement', 'écrit']].copy()
-        ecrit_summary = ecrit_summary.rename(columns={'écrit': 'moyenne'})
-        ecrit_summary = ecrit_summary.sort_values(by='moyenne', ascending=False).reset_index(drop=True)
-        ecrit_summary['rang'] = ecrit_summary.index + 1
-        ecrit_summary['highlight'] = ecrit_summary['établissement'] == highlighted_etablissement_eaf
-
-        # Graphique de classement pour "Écrit"
-        fig_ecrit = px.bar(
-            ecrit_summary,
-            x="moyenne",
-            y="établissement",
-            orientation="h",
-            text="rang",
-            labels={"moyenne": "Moyenne", "établissement": "Établissement"}
-        )
-        fig_ecrit.update_traces(marker_color=color_based_on_highlight(ecrit_summary), textposition='outside')
-        fig_ecrit.update_layout(yaxis=dict(autorange="reversed"))
-        fig_ecrit.update_layout(xaxis_title=None, yaxis_title=None)
+    # Affichage des résultats spécifiques pour l'établissement sélectionné
+    st.subheader(f"Résultats pour l'établissement : {highlighted_etablissement_eaf}")
 
-        st.plotly_chart(fig_ecrit, use_container_width=True)
+    # Création de la disposition à trois colonnes
+    col1, col2, col3 = st.columns(3)
 
-# Colonne 2 : Épreuve "Oral" - Affichage des métriques et du classement
-with col2:
+    # Colonne 1 : Épreuve "Écrit" - Affichage des métriques et du classement
+    with col1:
+        mean_ecrit, variation_ecrit = calculate_metrics_eaf(trends, session, highlighted_etablissement_eaf, "écrit")
+        with st.container(border=True):
+            st.write("**Écrit**")
+            st.metric(label=f"Moyenne {session}", value=f"{mean_ecrit:.2f}", delta=f"{variation_ecrit:.2f}%")
 
-    mean_2024_oral, variation_oral = calculate_metrics_eaf(eaf_df_year_2024, eaf_df_year_2023, highlighted_etablissement_eaf, "oral")
-    with st.container(border=True):
-        st.write("**Oral**")
-        st.metric(label="Moyenne 2024", value=f"{mean_2024_oral:.2f}", delta=f"{variation_oral:.2f}%")
-
-        # Préparer les données de classement pour "Oral"
-        oral_summary = eaf_df_year_2024[['établissement', 'oral']].copy()
-        oral_summary = oral_summary.rename(columns={'oral': 'moyenne'})
-        oral_summary = oral_summary.sort_values(by='moyenne', ascending=False).reset_index(drop=True)
-        oral_summary['rang'] = oral_summary.index + 1
-        oral_summary['highlight'] = oral_summary['établissement'] == highlighted_etablissement_eaf
-
-        # Graphique de classement pour "Oral"
-        fig_oral = px.bar(
-            oral_summary,
-            x="moyenne",
-            y="établissement",
-            orientation="h",
-            text="rang",
-            labels={"moyenne": "Moyenne", "établissement": "Établissement"}
-        )
-        fig_oral.update_traces(marker_color=color_based_on_highlight(oral_summary), textposition='outside')
-        fig_oral.update_layout(yaxis=dict(autorange="reversed"))
-        fig_oral.update_layout(xaxis_title=None, yaxis_title=None)
-
-        st.plotly_chart(fig_oral, use_container_width=True)
-
-# Colonne 3 : Scatter plot comparant les scores Écrit vs Oral
-with col3:
-    with st.container(border=True,height=633):
-        st.write('**Écrit vs Oral**')
-        eaf_df_year_2024['highlight'] = eaf_df_year_2024['établissement'] == highlighted_etablissement_eaf
-
-        fig_scatter = px.scatter(
-            eaf_df_year_2024,
-            x="écrit",
-            y="oral",
-            color='highlight',
-            color_discrete_map={True: '#ff6347', False: '#80c9e0'},
-            hover_name="établissement"
-        )
-        fig_scatter.update_layout(showlegend=False)
+            # Préparer les données de classement pour "Écrit"
+            ecrit_summary = highlight_etablissement(rankings.ranking('écrit', session), highlighted_etablissement_eaf)
 
-        st.plotly_chart(fig_scatter, use_container_width=True)
+            # Graphique de classement pour "Écrit"
+            fig_ecrit = patch_figure(ranking_chart(rankings, 'écrit', session), marker_color=color_based_on_highlight(ecrit_summary), rows=ranking_rows(ecrit_summary))
+
+            plotly_chart(fig_ecrit, use_container_width=True)
+
+    # Colonne 2 : Épreuve "Oral" - Affichage des métriques et du classement
+    with col2:
+
+        mean_oral, variation_oral = calculate_metrics_eaf(trends, session, highlighted_etablissement_eaf, "oral")
+        with st.container(border=True):
+            st.write("**Oral**")
+            st.metric(label=f"Moyenne {session}", value=f"{mean_oral:.2f}", delta=f"{variation_oral:.2f}%")
+
+            # Préparer les données de classement pour "Oral"
+            oral_summary = highlight_etablissement(rankings.ranking('oral', session), highlighted_etablissement_eaf)
+
+            # Graphique de classement pour "Oral"
+            fig_oral = patch_figure(ranking_chart(rankings, 'oral', session), marker_color=color_based_on_highlight(oral_summary), rows=ranking_rows(oral_summary))
+
+            plotly_chart(fig_oral, use_container_width=True)
+
+    # Colonne 3 : Scatter plot comparant les scores Écrit vs Oral
+    with col3:
+        with st.container(border=True,height=633):
+            st.write('**Écrit vs Oral**')
+            scatter_df = highlight_etablissement(eaf_session.df, highlighted_etablissement_eaf)
+
+            fig_scatter = patch_figure(scatter_chart(eaf_session), marker_color=color_based_on_highlight(scatter_df))
+
+            plotly_chart(fig_scatter, use_container_width=True)
+
+display_etablissement_section(rankings, trends, session, eaf_session)
+
+# Panneau de profilage (?debug=1 dans l'adresse de la page)
+with st.sidebar:
+    display_profiling_panel()
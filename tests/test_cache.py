@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from efe.cache import CacheFamily, _function_id, disk_memo, memoize
+
+
+@pytest.fixture
+def memo_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("EFE_MEMO_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.parametrize("copy", [True, False])
+def test_truncated_file_is_recomputed(memo_dir, copy):
+    calls = []
+
+    def compute(count):
+        calls.append(count)
+        return list(range(count))
+
+    cached = memoize(compute, name=f"compute_{copy}", copy=copy, persist=True)
+    assert cached(1000) == list(range(1000))
+    path, = disk_memo().files()
+    path.write_bytes(path.read_bytes()[:100])
+
+    cached.clear()
+    assert cached(1000) == list(range(1000))
+    assert calls == [1000, 1000]
+    assert len(path.read_bytes()) > 100
+
+
+def test_function_id_follows_defining_file(tmp_path):
+    module = tmp_path / "page.py"
+    module.write_text("OFFSET = 1\ndef helper(x):\n    return x + OFFSET\ndef compute(x):\n    return helper(x)\n")
+    namespace = {}
+    exec(compile(module.read_text(), str(module), "exec"), namespace)
+    before = _function_id(namespace["compute"], "compute")
+
+    module.write_text(module.read_text().replace("OFFSET = 1", "OFFSET = 2"))
+    assert _function_id(namespace["compute"], "compute") != before
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    family = CacheFamily("test", budget=30)
+    for key in "abc":
+        family.lookup(key, lambda: (key, 10))
+    family.lookup("a", lambda: pytest.fail("a est en cache"))
+
+    family.lookup("d", lambda: ("d", 10))
+    assert list(family.entries) == ["c", "a", "d"]
+    assert family.evictions == 1
+
+
+def test_entries_are_evicted_down_to_the_budget():
+    family = CacheFamily("test", budget=25)
+    family.lookup("a", lambda: ("a", 10))
+    family.lookup("b", lambda: ("b", 10))
+
+    family.lookup("c", lambda: ("c", 20))
+    assert list(family.entries) == ["c"]
+    assert (family.size, family.evictions) == (20, 2)
+
+    # Une entrée plus grosse que le budget est conservée seule
+    family.lookup("d", lambda: ("d", 40))
+    assert list(family.entries) == ["d"]
+    assert family.size == 40
+
+
+def test_concurrent_misses_compute_once():
+    family = CacheFamily("test", budget=100)
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "valeur", 1
+
+    def lookup(results):
+        barrier.wait()
+        results.append(family.lookup("clé", compute))
+
+    results = []
+    threads = [threading.Thread(target=lookup, args=(results,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["valeur"] * 8
+    assert len(calls) == 1
+    assert (family.misses, family.hits) == (1, 7)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from efe.correlations import Correlations
+
+SESSION = 2024
+
+
+def correlations_of(matrix):
+    épreuves = list(matrix.index)
+    scores = pd.DataFrame(
+        [[10.0] * len(épreuves)], columns=épreuves,
+        index=pd.MultiIndex.from_tuples([(SESSION, "Lycée A")], names=["session", "établissement"]),
+    )
+    matrices = pd.concat({(SESSION, "pearson"): matrix}, names=["session", "méthode", "épreuve"])
+    return Correlations.from_tables(scores, matrices, "test")
+
+
+def symmetric(values, épreuves):
+    values = np.triu(values, 1)
+    values = values + values.T + np.eye(len(épreuves))
+    return pd.DataFrame(values, index=épreuves, columns=épreuves)
+
+
+# Paires triées comme le faisait l'ancienne page DNB : toutes les paires (i < j), tri
+# stable par valeur absolue décroissante (corrélations manquantes écartées)
+def baseline_pairs(matrix, k):
+    pairs = [
+        (matrix.index[i], matrix.columns[j], matrix.iloc[i, j])
+        for i in range(len(matrix)) for j in range(i + 1, len(matrix))
+        if not np.isnan(matrix.iloc[i, j])
+    ]
+    return pd.DataFrame(sorted(pairs, key=lambda pair: abs(pair[2]), reverse=True)[:k],
+                        columns=["épreuve 1", "épreuve 2", "corrélation"])
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("k", [1, 2, 5, 10, 20])
+def test_top_pairs_match_full_sort(seed, k):
+    épreuves = [f"Épreuve {i}" for i in range(5)]
+    # Valeurs arrondies au dixième : nombreuses égalités, de signes opposés compris
+    values = np.random.default_rng(seed).uniform(-1, 1, (5, 5)).round(1)
+    matrix = symmetric(values, épreuves)
+    matrix.iloc[0, 3] = matrix.iloc[3, 0] = np.nan
+
+    top = correlations_of(matrix).top_pairs(SESSION, k=k)
+
+    # 9 paires renseignées : k = 10 ou 20 les renvoie toutes
+    assert len(top) == min(k, 9)
+    pd.testing.assert_frame_equal(top, baseline_pairs(matrix, k), check_index_type=False)
+
+
+def test_tied_pairs_keep_matrix_order():
+    épreuves = ["a", "b", "c", "d"]
+    matrix = symmetric(np.array([
+        [0, 0.5, -0.8, 0.2],
+        [0, 0, 0.8, 0.5],
+        [0, 0, 0, -0.5],
+        [0, 0, 0, 0],
+    ]), épreuves)
+
+    top = correlations_of(matrix).top_pairs(SESSION, k=4)
+    assert list(zip(top["épreuve 1"], top["épreuve 2"])) == [("a", "c"), ("b", "c"), ("a", "b"), ("b", "d")]
+    assert top["corrélation"].tolist() == [-0.8, 0.8, 0.5, 0.5]
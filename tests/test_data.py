@@ -0,0 +1,20 @@
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.synthetic import generate, write
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_local_source_runs_without_secrets(tmp_path, monkeypatch):
+    write(tmp_path / "onglets", generate(etablissements=5, specialities=2, sessions=2))
+    monkeypatch.setenv("EFE_DATA_DIR", str(tmp_path / "onglets"))
+    monkeypatch.setenv("EFE_SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    monkeypatch.setenv("EFE_MEMO_DIR", str(tmp_path / "memo"))
+    monkeypatch.delenv("EFE_BUNDLE_DIR", raising=False)
+
+    at = AppTest.from_file(str(ROOT / "pages" / "BAC.py"), default_timeout=60)
+    at.run()
+
+    assert not at.exception
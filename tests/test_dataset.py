@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+
+from efe.dataset import cache_resource, versioned
+
+
+def test_classes_declared_after_decoration_are_hashed_by_version():
+    calls = []
+
+    @cache_resource
+    def describe(table):
+        calls.append(table)
+        return table.version
+
+    # Classe déclarée après la décoration de la fonction mémoïsée
+    @versioned
+    @dataclass
+    class Table:
+        version: str
+        rows: object  # Non sérialisable : seule la version doit entrer dans la clé
+
+    assert describe(Table("v1", lambda: 1)) == "v1"
+    assert describe(Table("v1", lambda: 2)) == "v1"
+    assert describe(Table("v2", lambda: 1)) == "v2"
+    assert [table.version for table in calls] == ["v1", "v2"]
@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+from efe.aggregates import build_aggregates
+from efe.data import prepare_sheet
+from efe.etablissements import build_etablissements
+from efe.incremental import IncrementalAggregator
+from efe.query import build_engine
+
+
+def eds_dataset(rows, hash):
+    df = pd.DataFrame(rows, columns=["session", "établissement", "spécialité", "moyenne"])
+    return prepare_sheet("eds", df, {"hash": hash})
+
+
+def conformed(dataset):
+    etablissements = build_etablissements([dataset])
+    return etablissements.conform(dataset), etablissements
+
+
+def full_build(dataset, etablissements):
+    return lambda: build_aggregates(build_engine((dataset,), etablissements))
+
+
+OLD_ROWS = [(2024, "Lycée A", "SES", 10), (2024, "Lycée B", "SVT", 12)]
+
+
+def test_build_for_another_version_is_refused():
+    old, etablissements = conformed(eds_dataset(OLD_ROWS, "a" * 16))
+    new = etablissements.conform(eds_dataset(OLD_ROWS[:1] + [(2024, "Lycée B", "SVT", 13)], "b" * 16))
+    aggregator = IncrementalAggregator()
+
+    # Table de la nouvelle version construite alors que l'ancienne était demandée
+    with pytest.raises(ValueError):
+        aggregator.update([old], etablissements, build=full_build(new, etablissements))
+
+    aggregates = aggregator.update([old], etablissements, build=full_build(old, etablissements))
+    assert aggregates.version == old.version
+
+
+def test_merge_matches_full_build_with_new_etablissement():
+    old, old_etablissements = conformed(eds_dataset(OLD_ROWS, "a" * 16))
+    new, etablissements = conformed(eds_dataset(OLD_ROWS + [(2025, "Lycée C", "SES", 14)], "b" * 16))
+    aggregator = IncrementalAggregator()
+    aggregator.update([old], old_etablissements, build=full_build(old, old_etablissements))
+
+    merged = aggregator.update([new], etablissements, build=None)
+    expected = full_build(new, etablissements)()
+
+    # Valeurs et types (établissement : catégorie de la dimension courante)
+    assert merged.table.index.get_level_values("établissement").dtype == etablissements.dtype
+    pd.testing.assert_frame_equal(merged.table, expected.table)
+    for by in [("établissement",), ("spécialité",), ()]:
+        pd.testing.assert_frame_equal(merged.level(*by), expected.level(*by))
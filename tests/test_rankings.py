@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from efe.aggregates import build_aggregates
+from efe.data import prepare_sheet
+from efe.etablissements import build_etablissements
+from efe.query import build_engine
+from efe.figures import patch_figure
+from efe.rankings import AVERAGE_EAF, OVERALL_BAC, TOTAL_DNB, WINDOW_THRESHOLD, Rankings, window
+from efe.schema import SCHEMAS
+
+SESSION = 2024
+
+# Épreuves additionnées par l'ancienne page DNB
+DNB_SUBJECTS = [
+    "Français (sur 100)", "Hist. Géo.EMC (sur 50)", "Mathématiques (sur 100)",
+    "Sciences (sur 50)", "SO de projet (sur 100)"
+]
+
+
+def rankings_of(sheets):
+    datasets = [prepare_sheet(name, df, {"hash": f"{name:0<16}"}) for name, df in sheets.items()]
+    etablissements = build_etablissements(datasets)
+    datasets = tuple(etablissements.conform(dataset) for dataset in datasets)
+    return Rankings(build_aggregates(build_engine(datasets, etablissements)))
+
+
+# Classement calculé comme le faisaient les pages avant les classements partagés :
+# tri décroissant puis rang = position
+def baseline_ranking(totals):
+    totals = totals.sort_values(ascending=False)
+    return pd.DataFrame({"établissement": totals.index, "moyenne": totals.to_numpy(),
+                         "rang": np.arange(1, len(totals) + 1)})
+
+
+def test_ties_share_the_best_rank_and_are_ordered_by_name():
+    eaf = pd.DataFrame({
+        "session": SESSION,
+        "établissement": ["Lycée D", "Lycée B", "Lycée C", "Lycée A", "Lycée E"],
+        "écrit": [12, 14, 12, 12, 10],
+        "oral": [12, 14, 12, 12, 10],
+    })
+    rankings = rankings_of({"eaf": eaf})
+
+    for épreuve in ["écrit", AVERAGE_EAF]:
+        ranking = rankings.ranking(épreuve, SESSION)
+        assert ranking["établissement"].tolist() == ["Lycée B", "Lycée A", "Lycée C", "Lycée D", "Lycée E"]
+        assert ranking["rang"].tolist() == [1, 2, 2, 2, 5]
+        assert rankings.rank(épreuve, SESSION, "Lycée D") == 2
+
+
+def test_overall_bac_matches_baseline():
+    philo = pd.DataFrame({
+        "session": SESSION,
+        "établissement": ["Lycée A", "Lycée A", "Lycée B", "Lycée C"],
+        "moyenne": [11.5, 12.25, 9.75, 14],
+    })
+    eds = pd.DataFrame({
+        "session": SESSION,
+        "établissement": ["Lycée A", "Lycée A", "Lycée B", "Lycée B", "Lycée B", "Lycée D"],
+        "spécialité": ["SES", "SVT", "SES", "SES", "Mathématiques", "SVT"],
+        "moyenne": [13.5, 8.25, 10, 15.5, 12.75, 16],
+    })
+    go = pd.DataFrame({
+        "session": SESSION,
+        "établissement": ["Lycée A", "Lycée C", "Lycée D"],
+        "moyenne": [15.25, 13.5, 9],
+    })
+    rankings = rankings_of({"philosophie": philo, "eds": eds, "go": go})
+
+    # Moyenne des moyennes par épreuve, épreuves absentes ignorées
+    averages = pd.concat([df.groupby("établissement")["moyenne"].mean() for df in (philo, eds, go)], axis=1)
+    expected = baseline_ranking(averages.mean(axis=1, skipna=True).round(2))
+
+    pd.testing.assert_frame_equal(rankings.ranking(OVERALL_BAC, SESSION), expected,
+                                  check_dtype=False, check_categorical=False)
+
+
+@pytest.mark.parametrize("composite, how, decimals", [(TOTAL_DNB, "sum", 0), (AVERAGE_EAF, "mean", 2)])
+def test_per_row_composites_match_baseline(composite, how, decimals):
+    etablissements = ["Lycée A", "Lycée B", "Lycée C", "Lycée D"]
+    if composite == TOTAL_DNB:
+        columns = DNB_SUBJECTS
+        sheets = {"dnb": pd.DataFrame({
+            "session": SESSION, "établissement": etablissements,
+            **{column: [71.5 + i * 3.25 - j * 5 for j in range(4)] for i, column in enumerate(SCHEMAS["dnb"].scores)},
+        })}
+    else:
+        columns = ["écrit", "oral"]
+        sheets = {"eaf": pd.DataFrame({
+            "session": SESSION, "établissement": etablissements,
+            "écrit": [11.25, 9.5, 14.75, 12.5], "oral": [13.5, 16.25, 10.5, 13],
+        })}
+    df, = sheets.values()
+    rankings = rankings_of(sheets)
+
+    totals = getattr(df.set_index("établissement")[columns], how)(axis=1).round(decimals)
+    pd.testing.assert_frame_equal(rankings.ranking(composite, SESSION), baseline_ranking(totals),
+                                  check_dtype=False, check_categorical=False)
+
+
+def long_ranking(count):
+    return pd.DataFrame({
+        "établissement": [f"Lycée {i:02d}" for i in range(count)],
+        "moyenne": np.linspace(18, 6, count).round(2),
+        "rang": np.arange(1, count + 1),
+    })
+
+
+def test_short_rankings_are_not_windowed():
+    assert window(long_ranking(WINDOW_THRESHOLD), "Lycée 00") is None
+    assert window(long_ranking(WINDOW_THRESHOLD + 1), "Lycée 00") is not None
+
+
+@pytest.mark.parametrize("position, expected", [
+    (20, [*range(10), *range(17, 24), *range(35, 40)]),  # Au milieu
+    (2, [*range(10), *range(35, 40)]),                   # Dans les premiers
+    (11, [*range(15), *range(35, 40)]),                  # Contigu aux premiers
+    (38, [*range(10), *range(35, 40)]),                  # Dans les derniers
+    (None, [*range(10), *range(35, 40)]),                # Non classé
+])
+def test_window_keeps_top_bottom_and_around_selection(position, expected):
+    selected = "Lycée hors classement" if position is None else f"Lycée {position:02d}"
+    assert window(long_ranking(40), selected) == expected
+
+
+def test_windowed_figure_keeps_the_highlighted_etablissement():
+    ranking = long_ranking(40)
+    selected = "Lycée 25"
+    colors = ["#ff6347" if name == selected else "#80c9e0" for name in ranking["établissement"]]
+    template = {"data": [{"type": "bar", "x": ranking["établissement"].tolist(), "y": ranking["moyenne"].tolist()}],
+                "layout": {}}
+
+    figure = patch_figure(template, marker_color=colors, rows=window(ranking, selected))
+
+    bars = figure.data[0]
+    assert len(bars.x) == 10 + 7 + 5
+    assert [x for x, color in zip(bars.x, bars.marker.color) if color == "#ff6347"] == [selected]
+    assert list(bars.x[10:17]) == [f"Lycée {i}" for i in range(22, 29)]
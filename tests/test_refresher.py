@@ -0,0 +1,112 @@
+import threading
+import time
+
+from efe.refresher import SheetRefresher
+
+MAX_AGE = 60
+
+
+# Copie locale en mémoire : read et refresh peuvent être retenus (reading,
+# refreshing) ou échouer
+class FakeStore:
+    max_age = MAX_AGE
+
+    def __init__(self, value, checked_at):
+        self.value = value
+        self.checked_at = checked_at
+        self.reads = 0
+        self.refreshes = 0
+        self.reading = threading.Event()
+        self.refreshing = threading.Event()
+        self.reading.set()
+        self.refreshing.set()
+        self.started = threading.Event()
+        self.next_value = None
+        self.error = None
+
+    def read(self, name, gid, allow_stale=False):
+        self.reads += 1
+        self.started.set()
+        self.reading.wait(5)
+        return self.value
+
+    def read_local(self, name):
+        return self.value
+
+    def metadata(self, name):
+        return {"checked_at": self.checked_at}
+
+    def refresh(self, name, gid):
+        self.refreshes += 1
+        self.started.set()
+        self.refreshing.wait(5)
+        if self.error is not None:
+            raise self.error
+        if self.next_value is None:
+            return False
+        self.value, self.checked_at = self.next_value, time.time()
+        return True
+
+
+def wait_idle(refresher):
+    deadline = time.time() + 5
+    while any(status["en_cours"] for status in refresher.status()):
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+def test_concurrent_first_loads_read_once():
+    store = FakeStore("valeur", checked_at=time.time())
+    store.reading.clear()
+    refresher = SheetRefresher(store, {"eds": 0})
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(refresher.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    assert store.started.wait(5)
+    time.sleep(0.05)
+
+    store.reading.set()
+    for thread in threads:
+        thread.join()
+    assert results == [{"eds": "valeur"}] * 8
+    assert store.reads == 1
+
+
+def test_stale_copy_is_served_while_revalidating():
+    store = FakeStore("ancienne", checked_at=time.time() - 2 * MAX_AGE)
+    store.refreshing.clear()
+    store.next_value = "nouvelle"
+    refresher = SheetRefresher(store, {"eds": 0})
+
+    # Copie périmée : servie aussitôt, revalidée en arrière-plan
+    assert refresher.get() == {"eds": "ancienne"}
+    deadline = time.time() + 5
+    while store.refreshes == 0:
+        assert time.time() < deadline
+        time.sleep(0.01)
+    assert refresher.get() == {"eds": "ancienne"}
+    assert refresher.status()[0]["en_cours"]
+    assert store.refreshes == 1
+
+    store.refreshing.set()
+    wait_idle(refresher)
+    assert refresher.get() == {"eds": "nouvelle"}
+    assert refresher.status()[0]["age"] < MAX_AGE
+
+
+def test_status_after_failed_revalidation():
+    store = FakeStore("ancienne", checked_at=time.time() - 2 * MAX_AGE)
+    store.error = ConnectionError("source injoignable")
+    refresher = SheetRefresher(store, {"eds": 0})
+
+    assert refresher.get() == {"eds": "ancienne"}
+    wait_idle(refresher)
+
+    status, = refresher.status()
+    assert status["erreur"] == "ConnectionError: source injoignable"
+    assert status["age"] >= 2 * MAX_AGE
+    assert not status["en_cours"]
+    # Échec récent : pas de nouvelle tentative avant max_age, la copie reste servie
+    assert refresher.get() == {"eds": "ancienne"}
+    assert store.refreshes == 1
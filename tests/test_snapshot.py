@@ -0,0 +1,28 @@
+import pandas as pd
+
+from efe import snapshot
+from efe.snapshot import LocalDirectorySource, SnapshotStore
+
+
+def write_go(directory, scores):
+    df = pd.DataFrame({"session": 2024, "établissement": "Lycée A", "moyenne": scores})
+    df.to_csv(directory / "go.csv", index=False)
+
+
+def test_unchanged_streamed_sheet_is_not_parsed(tmp_path, monkeypatch):
+    write_go(tmp_path, [10, 12, 14])
+    store = SnapshotStore(LocalDirectorySource(tmp_path), directory=tmp_path / "copies", chunksize=2)
+    assert store.refresh("go", "0")
+
+    def parse(*args, **kwargs):
+        raise AssertionError("export analysé alors que son contenu n'a pas changé")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(snapshot, "stream_sheet", parse)
+        assert not store.refresh("go", "0")
+
+    write_go(tmp_path, [10, 12, 15])
+    assert store.refresh("go", "0")
+    assert store.read_local("go")["moyenne (somme)"].tolist() == [37]
+    # Le fichier temporaire de l'export est supprimé
+    assert sorted(path.name for path in store.directory.iterdir()) == ["go.json", "go.parquet"]
@@ -0,0 +1,70 @@
+import io
+
+import pandas as pd
+import pytest
+
+from efe.aggregates import build_aggregates, delta
+from efe.data import prepare_sheet
+from efe.etablissements import build_etablissements
+from efe.incremental import row_changes
+from efe.query import build_engine
+from efe.streaming import stream_sheet
+
+SESSION = 2024
+
+
+# Onglet EDS à une ligne par candidat : groupes de tailles très différentes
+def eds_csv(rows):
+    df = pd.DataFrame(rows, columns=["session", "établissement", "spécialité", "moyenne"])
+    return df.to_csv(index=False).encode()
+
+
+CANDIDATES = (
+    [(SESSION, "Lycée A", "Mathématiques", 10)] * 100
+    + [(SESSION, "Lycée A", "SES", 20)] * 2
+    + [(SESSION, "Lycée B", "Mathématiques", 12)] * 2
+)
+
+
+def aggregates_of(raw, chunksize=None):
+    if chunksize:
+        df, content_hash, issues = stream_sheet("eds", io.BytesIO(raw), chunksize)
+        dataset = prepare_sheet("eds", df, {"hash": content_hash, "issues": issues})
+    else:
+        dataset = prepare_sheet("eds", pd.read_csv(io.BytesIO(raw)), {"hash": "0" * 16})
+    etablissements = build_etablissements([dataset])
+    dataset = etablissements.conform(dataset)
+    return dataset, etablissements, build_aggregates(build_engine((dataset,), etablissements))
+
+
+def test_streamed_means_are_weighted_by_group_size():
+    _, _, aggregates = aggregates_of(eds_csv(CANDIDATES), chunksize=7)
+
+    assert aggregates.mean("EDS", SESSION, "Lycée A", "SES") == pytest.approx(20)
+    assert aggregates.mean("EDS", SESSION, "Lycée A") == pytest.approx(1040 / 102)
+    assert aggregates.mean("EDS", SESSION, spécialité="Mathématiques") == pytest.approx(1024 / 102)
+    assert aggregates.mean("EDS", SESSION) == pytest.approx(1064 / 104)
+
+
+def test_streamed_aggregates_match_row_aggregates():
+    raw = eds_csv(CANDIDATES)
+    _, _, streamed = aggregates_of(raw, chunksize=7)
+    _, _, full = aggregates_of(raw)
+
+    for by in [("établissement", "spécialité"), ("établissement",), ("spécialité",), ()]:
+        pd.testing.assert_frame_equal(
+            streamed.level(*by)[["somme", "nombre", "moyenne"]],
+            full.level(*by)[["somme", "nombre", "moyenne"]],
+        )
+
+
+def test_streamed_delta_keeps_weights():
+    old, _, aggregates = aggregates_of(eds_csv(CANDIDATES), chunksize=7)
+    new, etablissements, expected = aggregates_of(
+        eds_csv(CANDIDATES + [(SESSION, "Lycée A", "SES", 20)] * 3), chunksize=7
+    )
+
+    merged = aggregates.merge(delta("eds", *row_changes(old.df, new.df)), expected.version, etablissements)
+
+    assert merged.mean("EDS", SESSION, "Lycée A") == pytest.approx(1100 / 105)
+    pd.testing.assert_frame_equal(merged.level()[["somme", "nombre"]], expected.level()[["somme", "nombre"]])